@@ -1,12 +1,31 @@
+import functools
+import json
+import os
+import time
 from abc import ABCMeta, abstractmethod
-from torch._inductor.codecache import AsyncCompile
+from concurrent.futures import ThreadPoolExecutor
+from filelock import FileLock
+from torch._inductor.codecache import AsyncCompile, cache_dir
+from dicp.dynamo_bridge.compile_profiler import compile_profiler
+
+# byte quota of the on-disk artifact cache, 0 means unlimited
+artifact_cache_size = int(os.environ.get("DICP_ARTIFACT_CACHE_SIZE_MB", "0")) * 1024 * 1024
+
+ARTIFACT_LOCK_TIMEOUT = 600
+
+# number of graphs built concurrently, 1 builds each graph synchronously
+compile_threads = int(os.environ.get("DICP_COMPILE_THREADS", min(32, os.cpu_count() or 1)))
+
+# seconds a single graph build may take, 0 means no limit
+compile_timeout = float(os.environ.get("DICP_COMPILE_TIMEOUT", "0")) or None
 
 
 class DeviceCompileJob():
     __metaclass__ = ABCMeta
 
     def __init__(self):
-        pass
+        # jobs are built and loaded outside the graph's compile, keep its name for profiling
+        self.profile_graph = compile_profiler.current_graph()
 
     @abstractmethod
     def get_key():
@@ -16,6 +35,142 @@ class DeviceCompileJob():
     def get_compile_result():
         pass
 
+    def build(self):
+        # produce the artifacts without touching the device, may run in a worker thread
+        pass
+
+
+class ArtifactCache:
+    """
+    Cross-process cache of compiled graph artifacts (.om/.so/.bin).
+
+    An index file maps a key to (path, size, build_time, last_hit). Artifacts
+    are built into a temporary file and published with os.replace, so other
+    processes never observe half-written files. When the total size exceeds
+    max_bytes, the least recently hit artifacts are evicted.
+    """
+
+    def __init__(self, root=None, max_bytes=artifact_cache_size):
+        self._root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def root(self):
+        # resolved lazily to respect TORCHINDUCTOR_CACHE_DIR set after import
+        if self._root is None:
+            self._root = os.path.join(cache_dir(), "dicp_artifacts")
+        os.makedirs(os.path.join(self._root, "locks"), exist_ok=True)
+        return self._root
+
+    def _index_path(self):
+        return os.path.join(self.root, "index.json")
+
+    def _lock(self, name="index"):
+        return FileLock(os.path.join(self.root, "locks", name + ".lock"),
+                        timeout=ARTIFACT_LOCK_TIMEOUT)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, index):
+        tmp_path = f"{self._index_path()}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _lookup(self, key, path):
+        with self._lock():
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None or not os.path.exists(entry["path"]):
+                if not os.path.exists(path):
+                    index.pop(key, None)
+                    self._save_index(index)
+                    return None
+                # artifact published before the index existed
+                entry = {"path": path, "size": os.path.getsize(path), "build_time": 0.0}
+            entry["last_hit"] = time.time()
+            index[key] = entry
+            self._save_index(index)
+            return entry["path"]
+
+    def _publish(self, key, path, build_time):
+        with self._lock():
+            index = self._load_index()
+            index[key] = {
+                "path": path,
+                "size": os.path.getsize(path),
+                "build_time": build_time,
+                "last_hit": time.time(),
+            }
+            self._evict(index, keep=key)
+            self._save_index(index)
+
+    def _evict(self, index, keep):
+        if self.max_bytes <= 0:
+            return
+        total = sum(entry["size"] for entry in index.values())
+        candidates = sorted((k for k in index if k != keep),
+                            key=lambda k: index[k]["last_hit"])
+        for k in candidates:
+            if total <= self.max_bytes:
+                break
+            entry = index.pop(k)
+            total -= entry["size"]
+            if os.path.exists(entry["path"]):
+                os.remove(entry["path"])
+            self.evictions += 1
+
+    def fetch(self, key, path, build_fn):
+        """
+        Return the artifact path for key, building it on a miss.
+
+        build_fn(tmp_path) must write the artifact to tmp_path, which is
+        then atomically moved to path.
+        """
+        cached = self._lookup(key, path)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        # serialize builds of the same key across processes
+        with self._lock(key):
+            cached = self._lookup(key, path)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            start = time.time()
+            try:
+                build_fn(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._publish(key, path, time.time() - start)
+        return path
+
+    def stats(self):
+        index = self._load_index()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(index),
+            "bytes": sum(entry["size"] for entry in index.values()),
+        }
+
+
+artifact_cache = ArtifactCache()
+
 
 class DeviceKernelCache:
     cache = dict()
@@ -31,6 +186,41 @@ class DeviceKernelCache:
         return cls.cache[key]
 
 
+class DeviceKernelFuture:
+    """
+    Kernel whose artifacts are built in the compile pool.
+
+    build() only produces host-side artifacts. The build is waited for and
+    get_compile_result() loads the kernel onto the device on the first call,
+    from the calling thread, so device resources stay bound to that thread.
+    compile_timeout counts from the submission of the build.
+    """
+
+    def __init__(self, device_compile_job, future):
+        self._device_compile_job = device_compile_job
+        self._future = future
+        self._kernel = None
+        self._deadline = None if compile_timeout is None else time.monotonic() + compile_timeout
+
+    def result(self):
+        if self._kernel is None:
+            timeout = None if self._deadline is None else max(self._deadline - time.monotonic(), 0)
+            self._future.result(timeout=timeout)
+            self._kernel = DeviceKernelCache.get_kernel(self._device_compile_job).run
+        return self._kernel
+
+    def __call__(self, *args, **kwargs):
+        return self.result()(*args, **kwargs)
+
+
 class AsyncCompileKernel(AsyncCompile):
+    @staticmethod
+    @functools.lru_cache(1)
+    def device_pool():
+        return ThreadPoolExecutor(compile_threads)
+
     def compile_kernel(self, device_compile_job):
-        return DeviceKernelCache.get_kernel(device_compile_job).run
+        if compile_threads <= 1 or device_compile_job.get_key() in DeviceKernelCache.cache:
+            return DeviceKernelCache.get_kernel(device_compile_job).run
+        future = self.device_pool().submit(device_compile_job.build)
+        return DeviceKernelFuture(device_compile_job, future)
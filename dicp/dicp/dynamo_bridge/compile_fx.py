@@ -1,6 +1,9 @@
 from torch._dynamo.backends.common import aot_autograd
 from torch._functorch.aot_autograd import make_boxed_func
 from .graph import GraphTransformer
+from .compile_profiler import compile_profiler
+from .operator import graph_fake_mode_scope
+from . import shape_bucket
 import functools
 import itertools
 import logging
@@ -80,10 +83,31 @@ def compile_fx_inner(
     # to adapt large/deep models
     sys.setrecursionlimit(max(sys.getrecursionlimit(), 2000))
 
-    gt = GraphTransformer(gm, backend)
-    gt.transform()
-    gt.infer_shape_dtype()
-    compiled_fn = gt.compile_to_fn()
+    compile_fn = functools.partial(
+        compile_graph, is_backward=is_backward, graph_id=graph_id, backend=backend)
+    if shape_bucket.shape_buckets and not is_backward and shape_bucket.has_dynamic_inputs(gm):
+        buckets = shape_bucket.bucketed_symbols(gm)
+        if buckets is not None:
+            # static graphs are compiled per shape bucket on first call
+            return shape_bucket.BucketedGraph(gm, compile_fn, buckets)
+    return compile_fn(gm, example_inputs)
+
+
+def compile_graph(
+    gm: torch.fx.GraphModule,
+    example_inputs: List[torch.Tensor],
+    is_backward=False,
+    graph_id=None,
+    backend=None
+):
+    with compile_profiler.graph(profile_graph_name(graph_id, is_backward)), \
+            compile_profiler.stage("compile_fx_inner"), graph_fake_mode_scope():
+        compile_profiler.record(nodes=len(gm.graph.nodes))
+        gt = GraphTransformer(gm, backend)
+        gt.transform()
+        gt.infer_shape_dtype()
+        compile_profiler.record(transformed_nodes=len(gt.gm.graph.nodes))
+        compiled_fn = gt.compile_to_fn()
 
     # aot autograd needs to know to pass in inputs as a list
     compiled_fn._boxed_call = True
@@ -93,6 +117,11 @@ def compile_fx_inner(
 _graph_counter = itertools.count(0)
 
 
+def profile_graph_name(graph_id, is_backward=False):
+    # aot_autograd traces the forward and joint graph, its time is part of the forward entry
+    return f"graph{graph_id}_{'backward' if is_backward else 'forward'}"
+
+
 def compile_fx(
     model_: torch.fx.GraphModule,
     example_inputs_: List[torch.Tensor],
@@ -146,11 +175,12 @@ def compile_fx_200(
         )
 
     decompositions = get_decompositions(backend=backend)
-    return aot_autograd(
-        fw_compiler=fw_compiler,
-        bw_compiler=bw_compiler,
-        decompositions=decompositions
-    )(model_, example_inputs_)
+    with compile_profiler.graph(profile_graph_name(graph_id)), compile_profiler.stage("aot_autograd"):
+        return aot_autograd(
+            fw_compiler=fw_compiler,
+            bw_compiler=bw_compiler,
+            decompositions=decompositions
+        )(model_, example_inputs_)
 
 
 def compile_fx_210(
@@ -250,14 +280,15 @@ def compile_fx_210(
     # TODO: can add logging before/after the call to create_aot_dispatcher_function
     # in torch._functorch/aot_autograd.py::aot_module_simplified::aot_function_simplified::new_func
     # once torchdynamo is merged into pytorch
-    return aot_autograd(
-        fw_compiler=fw_compiler,
-        bw_compiler=bw_compiler,
-        inference_compiler=inference_compiler,
-        decompositions=decompositions,
-        partition_fn=partition_fn,
-        keep_inference_input_mutations=True,
-    )(model_, example_inputs_)
+    with compile_profiler.graph(profile_graph_name(graph_id)), compile_profiler.stage("aot_autograd"):
+        return aot_autograd(
+            fw_compiler=fw_compiler,
+            bw_compiler=bw_compiler,
+            inference_compiler=inference_compiler,
+            decompositions=decompositions,
+            partition_fn=partition_fn,
+            keep_inference_input_mutations=True,
+        )(model_, example_inputs_)
 
 
 def count_tangents(fx_g: torch.fx.GraphModule):
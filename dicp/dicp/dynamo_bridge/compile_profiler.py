@@ -0,0 +1,175 @@
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# output directory of the compile profile, empty means disabled
+compile_profile_dir = os.getenv("DICP_COMPILE_PROFILE", "")
+
+
+class CompileProfiler:
+    """
+    Per-graph timing of the dicp compile pipeline.
+
+    Enabled by DICP_COMPILE_PROFILE=<dir> or enable(dir). Stages are attributed
+    to the graph set with graph() on the current thread, or to an explicit
+    graph name for work running elsewhere (e.g. builds in the compile pool).
+    dump() writes compile_summary.json and a chrome trace compile_trace.json.
+    """
+
+    def __init__(self, output_dir=compile_profile_dir):
+        self.enabled = False
+        self.output_dir = None
+        self.events = []
+        self.counters = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._dump_registered = False
+        if output_dir:
+            self.enable(output_dir)
+
+    def enable(self, output_dir=None):
+        # without an output directory events are only kept in memory
+        self.enabled = True
+        self.output_dir = output_dir
+        if output_dir and not self._dump_registered:
+            atexit.register(self.dump)
+            self._dump_registered = True
+
+    def disable(self):
+        self.enabled = False
+        self.output_dir = None
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+            self.counters = {}
+
+    def current_graph(self):
+        return getattr(self._local, "graph", None)
+
+    @contextlib.contextmanager
+    def graph(self, name):
+        prev = self.current_graph()
+        self._local.graph = name
+        try:
+            yield
+        finally:
+            self._local.graph = prev
+
+    @contextlib.contextmanager
+    def stage(self, name, graph=None):
+        if not self.enabled:
+            yield
+            return
+        graph = graph if graph is not None else self.current_graph()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.events.append({
+                    "name": name,
+                    "graph": str(graph),
+                    "start": start - self._origin,
+                    "dur": end - start,
+                    "tid": threading.get_ident(),
+                })
+
+    def timed(self, name):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, graph=None, **counters):
+        if not self.enabled:
+            return
+        graph = graph if graph is not None else self.current_graph()
+        with self._lock:
+            self.counters.setdefault(str(graph), {}).update(counters)
+
+    def _self_times(self):
+        # stages nest on a thread, subtract children so nothing is counted twice
+        self_times = [e["dur"] for e in self.events]
+        by_thread = {}
+        for idx, e in enumerate(self.events):
+            by_thread.setdefault(e["tid"], []).append(idx)
+        for indices in by_thread.values():
+            indices.sort(key=lambda i: (self.events[i]["start"], -self.events[i]["dur"]))
+            stack = []
+            for idx in indices:
+                e = self.events[idx]
+                while stack and self.events[stack[-1]]["start"] + self.events[stack[-1]]["dur"] <= e["start"]:
+                    stack.pop()
+                if stack:
+                    self_times[stack[-1]] -= e["dur"]
+                stack.append(idx)
+        return self_times
+
+    def summary(self):
+        with self._lock:
+            graphs = {}
+            stages = {}
+            for e, self_time in zip(self.events, self._self_times()):
+                g = graphs.setdefault(e["graph"], {"total": 0.0, "stages": {}})
+                g["total"] += self_time
+                g["stages"][e["name"]] = g["stages"].get(e["name"], 0.0) + self_time
+                s = stages.setdefault(e["name"], {"total": 0.0, "count": 0})
+                s["total"] += self_time
+                s["count"] += 1
+            for name, counters in self.counters.items():
+                graphs.setdefault(name, {"total": 0.0, "stages": {}}).update(counters)
+        return {"graphs": graphs, "stages": stages}
+
+    def table(self, top=10):
+        summary = self.summary()
+        lines = [f"{'graph':<24}{'total(s)':>10}{'nodes':>8}{'artifact(B)':>14}  slowest stage"]
+        graphs = sorted(summary["graphs"].items(), key=lambda kv: kv[1]["total"], reverse=True)
+        for name, g in graphs[:top]:
+            slowest = max(g["stages"].items(), key=lambda kv: kv[1], default=("-", 0.0))
+            lines.append(f"{name:<24}{g['total']:>10.3f}{g.get('nodes', '-'):>8}"
+                         f"{g.get('artifact_bytes', '-'):>14}  {slowest[0]} ({slowest[1]:.3f}s)")
+        lines.append("")
+        lines.append(f"{'stage':<24}{'total(s)':>10}{'count':>8}")
+        stages = sorted(summary["stages"].items(), key=lambda kv: kv[1]["total"], reverse=True)
+        for name, s in stages[:top]:
+            lines.append(f"{name:<24}{s['total']:>10.3f}{s['count']:>8}")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        with self._lock:
+            events = [{
+                "name": e["name"],
+                "cat": "dicp_compile",
+                "ph": "X",
+                "ts": e["start"] * 1e6,
+                "dur": e["dur"] * 1e6,
+                "pid": pid,
+                "tid": e["tid"],
+                "args": {"graph": e["graph"], **self.counters.get(e["graph"], {})},
+            } for e in self.events]
+        return {"traceEvents": events}
+
+    def dump(self, output_dir=None):
+        output_dir = output_dir or self.output_dir
+        if not output_dir or not self.events:
+            return
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "compile_summary.json"), "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(os.path.join(output_dir, "compile_trace.json"), "w") as f:
+            json.dump(self.chrome_trace(), f)
+        print(self.table())
+
+
+compile_profiler = CompileProfiler()
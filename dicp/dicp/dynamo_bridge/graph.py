@@ -6,11 +6,49 @@ from typing import List, Optional, Tuple
 from torch._dynamo.utils import dynamo_timed
 from torch._subclasses import FakeTensor, FakeTensorMode
 from torch._inductor.codecache import cache_dir
-from dicp.dynamo_bridge.utils import save_cpu_gm
+from dicp.dynamo_bridge.utils import save_cpu_gm, get_graph_key, snapshot_gm, lift_get_attrs, fetch_attr
+from dicp.dynamo_bridge.compile_profiler import compile_profiler
 from torch.fx.passes.shape_prop import _extract_tensor_metadata, TensorMetadata
 
 log = logging.getLogger(__name__)
 
+debug_save_cpu_gm = os.getenv("DICP_SAVE_CPU_GM", default="False") == "True"
+
+
+class LiftedWeights:
+    """
+    Reads the lifted attributes of a module when the graph is called, so
+    in-place updates and reassigned attributes are seen. A tensor on another
+    device than the models is moved there once per tensor version, the
+    device is resolved on the first move.
+    """
+
+    def __init__(self, module: torch.fx.GraphModule, targets: List[str], device_fn):
+        self.module = module
+        self.targets = targets
+        self.device_fn = device_fn
+        self.device = None
+        self.moved = [None] * len(targets)
+
+    def __call__(self):
+        weights = []
+        for idx, target in enumerate(self.targets):
+            weight = fetch_attr(self.module, target)
+            if self.device is None or weight.device != self.device:
+                weight = self.move(idx, weight)
+            weights.append(weight)
+        return weights
+
+    def move(self, idx, weight):
+        if self.device is None:
+            self.device = self.device_fn()
+            if weight.device == self.device:
+                return weight
+        moved = self.moved[idx]
+        if moved is None or moved[0] is not weight or moved[1] != weight._version:
+            moved = self.moved[idx] = (weight, weight._version, weight.to(self.device))
+        return moved[2]
+
 
 class GraphTransformer:
     def __init__(
@@ -21,21 +59,45 @@ class GraphTransformer:
         self.gm = gm
         self.backend = backend
         self.folder = cache_dir()
-        self.cpu_gm, self.graph_key = save_cpu_gm(gm, self.folder)
+        self.lifted_weights = None
+        need_cpu_gm = debug_save_cpu_gm
         if backend == 'topsgraph':
             from dicp.vendor.TopsGraph.opset_transform import topsgraph_opset_transform
             self.backend_opset_transform = topsgraph_opset_transform
             from dicp.vendor.TopsGraph.codegen.enflame import EnflameCodegen
             self.backend_codegen = EnflameCodegen
+            from dicp.vendor.TopsGraph.config import tops_check_precision
+            need_cpu_gm = need_cpu_gm or tops_check_precision
         elif backend == 'ascendgraph':
             from dicp.vendor.AscendGraph.opset_convert import ascendgraph_opset_convert
             self.backend_opset_transform = ascendgraph_opset_convert
-            from dicp.vendor.AscendGraph.codegen.ascend import AscendCodegen
+            from dicp.vendor.AscendGraph.codegen.ascend import (
+                AscendCodegen, precision_check, weights_as_inputs, weights_device)
             self.backend_codegen = AscendCodegen
+            need_cpu_gm = need_cpu_gm or precision_check
+            # the precision check compares against the graph with its original inputs
+            if weights_as_inputs and not need_cpu_gm:
+                self.gm, targets = lift_get_attrs(gm)
+                if targets:
+                    self.lifted_weights = LiftedWeights(gm, targets, weights_device)
+        self.graph_key = get_graph_key(self.gm)
+        # the cpu reference module is only used by precision check and debugging,
+        # keep the untransformed graph and copy weights to cpu on first use
+        self._origin_gm = snapshot_gm(gm) if need_cpu_gm else None
+        self._cpu_gm = None
 
+    @property
+    def cpu_gm(self):
+        if self._cpu_gm is None and self._origin_gm is not None:
+            self._cpu_gm = save_cpu_gm(self._origin_gm, self.folder, self.graph_key)
+            self._origin_gm = None
+        return self._cpu_gm
+
+    @compile_profiler.timed("opset_transform")
     def transform(self):
         self.gm = self.backend_opset_transform(self.gm)
 
+    @compile_profiler.timed("infer_shape_dtype")
     def infer_shape_dtype(self):
         def make_tensor_meta(x) -> Optional[TensorMetadata]:
             if isinstance(x, FakeTensor):
@@ -43,9 +105,13 @@ class GraphTransformer:
             else:
                 return None
         test_infer = bool(os.environ.get("TEST_DICP_INFER", False))
+        sd_clast = os.getenv("DICP_SD_CLAST", default="False") == "True"
         for n in self.gm.graph.nodes:
             fake_value = None
             if n.op == 'call_function':
+                # nodes inferred by an earlier pass keep their meta, skip them
+                if n.meta.get('val', None) is not None and not test_infer and not sd_clast:
+                    continue
                 fake_value = (n.target(*n.args, **n.kwargs))
             elif n.op == 'get_attr':
                 target_atoms = n.target.split('.')
@@ -74,10 +140,11 @@ class GraphTransformer:
                 n.meta['val'] = fake_value
                 n.meta["tensor_meta"] = make_tensor_meta(n.meta['val'])
             # Modify strides of channels last tensor to keep contiguous.
-            if os.getenv("DICP_SD_CLAST", default="False") == "True":
+            if sd_clast:
                 n.meta['val'] = fake_value.contiguous() if isinstance(fake_value, FakeTensor) else fake_value
                 n.meta["tensor_meta"] = make_tensor_meta(n.meta['val'])
 
+    @compile_profiler.timed("codegen")
     def codegen(self):
         return self.backend_codegen(self.gm, self.cpu_gm, self.folder, self.graph_key).codegen()
 
@@ -87,11 +154,20 @@ class GraphTransformer:
 
         code = self.codegen()
 
-        mod = PyCodeCache.load(code)
+        with compile_profiler.stage("load_module"):
+            mod = PyCodeCache.load(code)
 
         # if dynamo_config.output_code:
         #     log.info("Output code: %s", mod.__file__)
         return mod
 
     def compile_to_fn(self):
-        return self.compile_to_module().call
+        call = self.compile_to_module().call
+        if self.lifted_weights is None:
+            return call
+        read_weights = self.lifted_weights
+
+        def call_with_weights(args):
+            args.extend(read_weights())
+            return call(args)
+        return call_with_weights
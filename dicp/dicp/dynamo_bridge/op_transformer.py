@@ -7,6 +7,7 @@ from torch.fx.proxy import Proxy
 from typing import Any, Dict, Tuple
 from dicp.dynamo_bridge.compile_fx import is_torch_210
 from dicp.dynamo_bridge.utils import symint_in_shape
+from dicp.dynamo_bridge.compile_profiler import compile_profiler
 
 
 class OpSetTransformer:
@@ -79,6 +80,9 @@ class SingleOpTransformer(torch.fx.Transformer):
 
 if is_torch_210:
     import functools
+    import logging
+    import time
+    from collections import defaultdict
     from typing import List
     from torch.fx.experimental.proxy_tensor import maybe_disable_fake_tensor_mode
     from torch._subclasses.fake_tensor import FakeTensorMode
@@ -88,6 +92,14 @@ if is_torch_210:
         register_replacement,
     )
 
+    log = logging.getLogger(__name__)
+
+    # a replacement may expose new matches, sweep again until nothing changes
+    PATTERN_MAX_ITERATIONS = 10
+
+    # pattern name -> [matches, seconds spent matching], over all graphs
+    pattern_stats = defaultdict(lambda: [0, 0.0])
+
     def symbolic_trace_ignore_args(fn, args):
         return torch.fx.symbolic_trace(fn)
 
@@ -111,6 +123,7 @@ if is_torch_210:
         @classmethod
         @functools.lru_cache(None)
         def register(cls, backend_patterns):
+            registered = {id(entry) for entries in backend_patterns.patterns.values() for entry in entries}
             register_replacement(
                 cls.pattern,
                 cls.replacement,
@@ -119,6 +132,11 @@ if is_torch_210:
                 backend_patterns,
                 extra_check=cls.check_fn,
             )
+            # name the new entries for per-pattern statistics
+            for entries in backend_patterns.patterns.values():
+                for entry in entries:
+                    if id(entry) not in registered:
+                        entry.backend_pattern = cls.__name__
 
     def register_backend_patterns(patterns_cls_list: List[BackendPatternBase], Pattern: BackendPatternBase):
         patterns_cls_list.append(Pattern)
@@ -132,16 +150,68 @@ if is_torch_210:
             for pattern in patterns_cls_list:
                 pattern.register(patterns)
 
+    class TimedPatternEntry:
+        # stands in for a registered entry, times its matching and counts the
+        # replacements; PatternMatcherPass reaches the pattern through entry.pattern
+        def __init__(self, entry, stats):
+            self.entry = entry
+            self.pattern = self
+            self.stats = stats[getattr(entry, "backend_pattern", str(entry.pattern))]
+
+        def __repr__(self):
+            return repr(self.entry.pattern)
+
+        def timed(self, fn, *args):
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self.stats[1] += time.perf_counter() - start
+
+        def match(self, node):
+            return self.timed(self.entry.pattern.match, node)
+
+        def extra_check(self, match):
+            return self.timed(self.entry.extra_check, match)
+
+        def apply(self, match, graph, node):
+            self.stats[0] += 1
+            return self.timed(self.entry.apply, match, graph, node)
+
     class BackendPatternMatcherTransformer:
         def __init__(self, patterns: PatternMatcherPass, patterns_cls_list: List[BackendPatternBase]):
             self._patterns = patterns
+            self.match_count = 0
             lazy_register_backend_patterns(
                 self._patterns, tuple(patterns_cls_list))
 
-        def transform(self, module: torch.fx.GraphModule):
-            match_count = self._patterns.apply(module)
-            if match_count:
+        def timed_pass(self, stats):
+            # the registered pass is shared between graphs, sweep with a copy
+            timed = PatternMatcherPass(self._patterns.prevent_match_across_mutations)
+            for target, entries in self._patterns.patterns.items():
+                timed.patterns[target] = [TimedPatternEntry(entry, stats) for entry in entries]
+            return timed
+
+        @compile_profiler.timed("pattern_matcher")
+        def transform(self, module: torch.fx.GraphModule, recompile=True):
+            # graph passes that follow do not need generated code, callers
+            # chaining them recompile once at the end
+            stats = defaultdict(lambda: [0, 0.0])
+            patterns = self.timed_pass(stats)
+            self.match_count = 0
+            for _ in range(PATTERN_MAX_ITERATIONS):
+                count = patterns.apply(module.graph)
+                self.match_count += count
+                if count == 0:
+                    break
+            for name, (matches, seconds) in stats.items():
+                pattern_stats[name][0] += matches
+                pattern_stats[name][1] += seconds
+                log.debug("pattern %s: %d matches, %.3f ms", name, matches, seconds * 1e3)
+            compile_profiler.record(**{f"pattern.{name}": matches for name, (matches, _) in stats.items() if matches})
+            if self.match_count:
                 stable_topological_sort(module.graph)
                 module.graph.lint()
-                module.recompile()
+                if recompile:
+                    module.recompile()
             return module
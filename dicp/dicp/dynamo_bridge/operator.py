@@ -1,4 +1,8 @@
+import collections
+import contextlib
 import logging
+import os
+import threading
 import traceback
 import torch
 from abc import ABC
@@ -10,6 +14,71 @@ from contextlib import nullcontext
 from torch._subclasses import FakeTensor, FakeTensorMode
 from dicp.dynamo_bridge.utils import TensorInfo
 
+infer_cache_enabled = os.getenv("DICP_INFER_CACHE", default="True") == "True"
+# number of inference results kept by InferResultCache
+infer_cache_size = int(os.getenv("DICP_INFER_CACHE_SIZE", default="4096"))
+meta_infer_enabled = os.getenv("DICP_META_INFER", default="True") == "True"
+
+_default_fake_mode = threading.local()
+
+
+def new_default_fake_mode():
+    if torch.__version__.startswith("2.0"):
+        shape_env = ShapeEnv() if config.use_dynamic_shapes else None
+        fake_mode = (
+            FakeTensorMode(shape_env=shape_env)
+            if config.use_fake_tensor
+            else nullcontext()
+        )
+    elif torch.__version__.startswith("2.1"):
+        shape_env = ShapeEnv() if torch._dynamo.config.dynamic_shapes else None
+        fake_mode = (
+            FakeTensorMode(shape_env=shape_env)
+            if config.fake_tensor_allow_meta
+            else nullcontext()
+        )
+    else:
+        raise ValueError(f"unsupported dicp torch version: {torch.__version__}")
+    return shape_env, fake_mode
+
+
+def get_default_fake_mode():
+    # used when no argument carries a fake mode, shared by the operators of one graph
+    modes = getattr(_default_fake_mode, "modes", None)
+    if modes is None:
+        modes = _default_fake_mode.modes = new_default_fake_mode()
+    return modes
+
+
+@contextlib.contextmanager
+def graph_fake_mode_scope():
+    # a graph gets its own default fake mode and ShapeEnv, symbols never leak across graphs
+    prev = getattr(_default_fake_mode, "modes", None)
+    _default_fake_mode.modes = None
+    try:
+        yield
+    finally:
+        _default_fake_mode.modes = prev
+
+
+def tensor_info_to_fake(info: TensorInfo, fake_mode: FakeTensorMode):
+    if info.stride is not None:
+        elem = torch.empty_strided(info.shape, info.stride, dtype=info.dtype, device="meta")
+    else:
+        elem = torch.empty(info.shape, dtype=info.dtype, device="meta",
+                           memory_format=info.memory_format)
+    return FakeTensor(fake_mode, elem, torch.device("cpu"))
+
+
+def infer_result_to_fake(res, fake_mode: FakeTensorMode):
+    def to_fake(x):
+        if not isinstance(x, TensorInfo):
+            return x
+        if isinstance(fake_mode, FakeTensorMode):
+            return tensor_info_to_fake(x, fake_mode)
+        return torch.empty(x.shape, dtype=x.dtype, memory_format=x.memory_format)
+    return tree_map(to_fake, res)
+
 
 class Operator(ABC):
     __name__: str
@@ -18,22 +87,14 @@ class Operator(ABC):
     def __init__(self, name_):
         super().__init__()
         self.__name__ = name_
-        if torch.__version__.startswith("2.0"):
-            self.shape_env = ShapeEnv() if config.use_dynamic_shapes else None
-            self.fake_mode = (
-                FakeTensorMode(shape_env=self.shape_env)
-                if config.use_fake_tensor
-                else nullcontext()
-            )
-        elif torch.__version__.startswith("2.1"):
-            self.shape_env = ShapeEnv() if torch._dynamo.config.dynamic_shapes else None
-            self.fake_mode = (
-                FakeTensorMode(shape_env=self.shape_env)
-                if config.fake_tensor_allow_meta
-                else nullcontext()
-            )
-        else:
-            raise ValueError(f"unsupported dicp torch version: {torch.__version__}")
+
+    @property
+    def shape_env(self):
+        return get_default_fake_mode()[0]
+
+    @property
+    def fake_mode(self):
+        return get_default_fake_mode()[1]
 
     @classmethod
     def get_singleton(cls):
@@ -45,6 +106,12 @@ class Operator(ABC):
     def name(self):
         return self.__name__
 
+    @classmethod
+    def metadata_only(cls):
+        # an infer_result annotated to return TensorInfo only reads argument metadata
+        infer_result = getattr(cls, "infer_result", None)
+        return getattr(infer_result, "__annotations__", {}).get("return", None) is TensorInfo
+
     # @abstractmethod
     # def infer_result(self, *args, **kwargs):
     #     pass
@@ -65,8 +132,27 @@ class Operator(ABC):
 
         new_args = tree_map(get_meta, args)
 
+        key = InferResultCache.get_key(self, new_args, kwargs)
+        if key is not None:
+            res = InferResultCache.lookup(key, self.get_fake_mode_from_args(new_args))
+            if res is not None:
+                return res
+        res = self.infer(new_args, kwargs)
+        if key is not None:
+            InferResultCache.insert(key, res)
+        return res
+
+    def infer(self, new_args, kwargs):
         fake_mode = self.get_fake_mode_from_args(new_args)
 
+        if meta_infer_enabled and isinstance(fake_mode, FakeTensorMode) and self.metadata_only():
+            # no argument conversion and no fake tensor dispatch
+            try:
+                return infer_result_to_fake(self.infer_result(*new_args, **kwargs), fake_mode)
+            except Exception:
+                log = logging.getLogger(__name__)
+                log.debug(str(self.__name__) + ": metadata infer failed, fallback to fake tensor")
+
         def make_faketensor(x):
             if not isinstance(x, torch.Tensor) or (
                 isinstance(x, FakeTensor) and x.fake_mode == fake_mode
@@ -89,7 +175,7 @@ class Operator(ABC):
         with fake_mode:
             try:
                 if hasattr(self, "infer_result"):
-                    return self.infer_result(*new_args, **kwargs)
+                    return infer_result_to_fake(self.infer_result(*new_args, **kwargs), fake_mode)
                 elif hasattr(self, "torch_op"):
                     return self.torch_op(*new_args, **kwargs)
             except Exception as e:
@@ -100,3 +186,84 @@ class Operator(ABC):
                     )
                 elif hasattr(self, "torch_op"):
                     log.warning("torch_op error: " + str(self.torch_op.__name__))
+
+
+class UncacheableInferArg(Exception):
+    pass
+
+
+class InferResultCache:
+    """
+    Memoized Operator inference results, shared by all nodes and graphs.
+
+    Results are keyed on the operator and the shape/dtype/stride of tensor
+    arguments plus the value of the other arguments. Arguments with symbolic
+    sizes are never cached since their results belong to one ShapeEnv.
+
+    Only the metadata of result tensors is kept, a hit builds new fake
+    tensors in the fake mode of the current arguments, so no tensor of an
+    earlier fake mode is shared. The least recently used entries are dropped
+    beyond DICP_INFER_CACHE_SIZE.
+    """
+    cache = collections.OrderedDict()
+    clear = staticmethod(cache.clear)
+    max_size = infer_cache_size
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def to_info(cls, x):
+        if isinstance(x, torch.Tensor):
+            if not isinstance(x, FakeTensor) or x.device.type != "cpu" or \
+                    any(isinstance(d, torch.SymInt) for d in list(x.shape) + list(x.stride())):
+                raise UncacheableInferArg()
+            return TensorInfo(list(x.shape), x.dtype, torch.contiguous_format, tuple(x.stride()))
+        return x
+
+    @classmethod
+    def insert(cls, key, res):
+        try:
+            info = tree_map(cls.to_info, res)
+        except UncacheableInferArg:
+            return
+        cls.misses += 1
+        cls.cache[key] = info
+        if len(cls.cache) > cls.max_size:
+            cls.cache.popitem(last=False)
+
+    @classmethod
+    def lookup(cls, key, fake_mode):
+        if key not in cls.cache or not isinstance(fake_mode, FakeTensorMode):
+            return None
+        cls.hits += 1
+        cls.cache.move_to_end(key)
+
+        def to_fake(x):
+            return tensor_info_to_fake(x, fake_mode) if isinstance(x, TensorInfo) else x
+        return tree_map(to_fake, cls.cache[key])
+
+    @classmethod
+    def arg_key(cls, x):
+        if isinstance(x, torch.Tensor):
+            if any(isinstance(d, torch.SymInt) for d in list(x.shape) + list(x.stride())):
+                raise UncacheableInferArg()
+            return ("tensor", tuple(x.shape), x.dtype, tuple(x.stride()),
+                    int(x.storage_offset()), x.device.type)
+        elif isinstance(x, (list, tuple)):
+            return (type(x).__name__, tuple(cls.arg_key(e) for e in x))
+        elif isinstance(x, dict):
+            return ("dict", tuple((k, cls.arg_key(v)) for k, v in sorted(x.items())))
+        elif isinstance(x, (bool, int, float, str, torch.dtype, torch.device,
+                            torch.memory_format, torch.layout)) or x is None:
+            # type is part of the key, so 1, 1.0 and True stay different
+            return (type(x).__name__, x)
+        raise UncacheableInferArg()
+
+    @classmethod
+    def get_key(cls, op, args, kwargs):
+        if not infer_cache_enabled:
+            return None
+        try:
+            return (op, cls.arg_key(args), cls.arg_key(kwargs))
+        except (UncacheableInferArg, TypeError):
+            return None
@@ -0,0 +1,334 @@
+import bisect
+import copy
+import logging
+import os
+from typing import Dict, Iterable, List
+
+import sympy
+import torch
+import torch.fx
+from torch._subclasses import FakeTensorMode
+from torch.fx.experimental.proxy_tensor import make_fx
+
+log = logging.getLogger(__name__)
+
+
+def parse_shape_buckets(spec: str):
+    # "input_ids.1=128,256,512;s0=64,128", a dim is named by <input>.<dim> or by its symbol
+    buckets = {}
+    for item in spec.split(";"):
+        if not item.strip():
+            continue
+        name, values = item.split("=")
+        buckets[name.strip()] = sorted(int(b) for b in values.split(",") if b.strip())
+    return buckets
+
+
+# bucket boundaries per declared dynamic dim, empty disables bucketing
+shape_buckets = parse_shape_buckets(os.getenv("DICP_SHAPE_BUCKETS", ""))
+
+# declared dims that stay correct when padded although the graph reduces over them
+pad_safe_dims = set(n.strip() for n in os.getenv("DICP_SHAPE_BUCKETS_PAD_SAFE", "").split(",") if n.strip())
+
+
+def set_shape_buckets(buckets: Dict[str, List[int]], pad_safe: Iterable[str] = ()):
+    global shape_buckets, pad_safe_dims
+    shape_buckets = {name: sorted(values) for name, values in buckets.items()}
+    pad_safe_dims = set(pad_safe)
+
+
+def sym_expr(value):
+    if isinstance(value, torch.SymInt):
+        return value.node.expr
+    return None
+
+
+def free_symbols(values):
+    symbols = set()
+    for v in values:
+        if isinstance(v, torch.SymInt):
+            symbols |= sym_expr(v).free_symbols
+        elif isinstance(v, torch.Tensor):
+            symbols |= free_symbols(v.shape)
+        elif isinstance(v, (list, tuple)):
+            symbols |= free_symbols(v)
+    return symbols
+
+
+def symbol_names(value):
+    # the symbol itself and the input dims it was created from, e.g. "s0", "L['x'].size()[1]", "x.1"
+    expr = sym_expr(value)
+    names = {str(expr)}
+    for source in value.node.shape_env.var_to_sources.get(expr, []):
+        names.add(source.name())
+        base, idx = getattr(source, "base", None), getattr(source, "idx", None)
+        if base is not None and idx is not None and source.name().startswith(f"{base.name()}.size()"):
+            base_name = getattr(base, "local_name", None) or getattr(base, "source_name", None) or base.name()
+            names.add(f"{base_name}.{idx}")
+    return names
+
+
+def has_dynamic_inputs(gm: torch.fx.GraphModule):
+    for node in gm.graph.nodes:
+        if node.op != 'placeholder':
+            continue
+        val = node.meta.get('val', None)
+        if isinstance(val, torch.SymInt):
+            return True
+        if isinstance(val, torch.Tensor) and any(isinstance(d, torch.SymInt) for d in val.shape):
+            return True
+    return False
+
+
+aten = torch.ops.aten
+
+# ops mixing the elements along a dim without removing it, (op, position of the dim argument)
+MIXING_OPS = {
+    aten._softmax.default: 1,
+    aten._log_softmax.default: 1,
+    aten.cumsum.default: 1,
+    aten.cumprod.default: 1,
+    aten.sort.default: 1,
+    aten.flip.default: 1,
+}
+
+MATMUL_OPS = (aten.mm.default, aten.bmm.default, aten.addmm.default, aten.baddbmm.default)
+
+VIEW_OPS = (aten.view.default, aten._unsafe_view.default, aten.reshape.default)
+
+
+def size_product(sizes):
+    return sympy.Mul(*[sym_expr(d) if isinstance(d, torch.SymInt) else sympy.Integer(d) for d in sizes])
+
+
+def is_view_size(node):
+    # a size only read to shape views, the views themselves are checked
+    return node.target in (aten.sym_size, aten.sym_size.int) and \
+        all(user.target in VIEW_OPS and user.args[0] is not node for user in node.users)
+
+
+def keeps_padded_dims(in_shape, out_shape, symbols):
+    # a view keeps the padding where it was when every padded dim comes out
+    # whole, with the same number of elements before and after it
+    for k, size in enumerate(in_shape):
+        if not free_symbols([size]) & symbols:
+            continue
+        before, after = size_product(in_shape[:k]), size_product(in_shape[k + 1:])
+        if not any(sympy.expand(sym_expr(d) - sym_expr(size)) == 0 and
+                   sympy.expand(size_product(out_shape[:m]) - before) == 0 and
+                   sympy.expand(size_product(out_shape[m + 1:]) - after) == 0
+                   for m, d in enumerate(out_shape) if isinstance(d, torch.SymInt)):
+            return False
+    return True
+
+
+def mutated_inputs(gm: torch.fx.GraphModule):
+    # placeholders written in place, directly or through a view
+    aliases = {n: n for n in gm.graph.nodes if n.op == 'placeholder'}
+    mutated = set()
+    for node in gm.graph.nodes:
+        if node.op != 'call_function' or not isinstance(node.target, torch._ops.OpOverload):
+            continue
+        schema = node.target._schema
+        for arg, value in zip(schema.arguments, node.args):
+            if arg.alias_info is not None and arg.alias_info.is_write and value in aliases:
+                mutated.add(aliases[value])
+        if node.target.is_view and node.args and node.args[0] in aliases:
+            aliases[node] = aliases[node.args[0]]
+    return mutated
+
+
+def mixing_nodes(gm: torch.fx.GraphModule, symbols):
+    """
+    Nodes whose result depends on how many elements a padded dim has:
+    reductions and indexing that remove the dim, normalizations along it,
+    matmuls contracting over it, concatenations along it and views merging
+    it with other dims.
+    """
+    mixing = []
+    for node in gm.graph.nodes:
+        if node.op != 'call_function':
+            continue
+        inputs = [a.meta.get('val', None) for a in node.all_input_nodes]
+        used = free_symbols(inputs) & symbols
+        if not used or is_view_size(node):
+            continue
+        out = node.meta.get('val', None)
+        if used - free_symbols([out]):
+            mixing.append(node)
+            continue
+        dims = []
+        if node.target in MIXING_OPS and isinstance(inputs[0], torch.Tensor):
+            dim = node.args[MIXING_OPS[node.target]] if len(node.args) > MIXING_OPS[node.target] else -1
+            for d in (dim if isinstance(dim, (list, tuple)) else [dim]):
+                dims.append(inputs[0].shape[d])
+        elif node.target in MATMUL_OPS:
+            mat = node.args[-2] if node.target in (aten.addmm.default, aten.baddbmm.default) else node.args[0]
+            dims.append(mat.meta['val'].shape[-1])
+        elif node.target is aten.native_layer_norm.default:
+            dims.extend(inputs[0].shape[-len(node.args[1]):])
+        elif node.target is aten.cat.default:
+            # the padding of the first tensor ends up between the tensors
+            dim = node.args[1] if len(node.args) > 1 else 0
+            dims.extend(t.meta['val'].shape[dim] for t in node.args[0] if t.meta['val'].dim() > 0)
+        elif node.target in VIEW_OPS and isinstance(inputs[0], torch.Tensor) and \
+                not keeps_padded_dims(list(inputs[0].shape), list(out.shape), symbols):
+            mixing.append(node)
+            continue
+        if free_symbols(dims) & symbols:
+            mixing.append(node)
+    return mixing
+
+
+def bucketed_symbols(gm: torch.fx.GraphModule, buckets=None, pad_safe=None):
+    """
+    Map every symbol of the graph inputs to its declared buckets, or return
+    None when the graph must stay dynamic: a symbol is not declared, an input
+    is mutated in place, or the graph mixes padded elements into the result
+    along a dim that is not declared pad safe.
+    """
+    buckets = buckets if buckets is not None else shape_buckets
+    pad_safe = pad_safe if pad_safe is not None else pad_safe_dims
+    declared, safe = {}, set()
+    for node in gm.graph.nodes:
+        if node.op != 'placeholder':
+            continue
+        val = node.meta.get('val', None)
+        sizes = [val] if isinstance(val, torch.SymInt) else list(val.shape) if isinstance(val, torch.Tensor) else []
+        for size in sizes:
+            if not isinstance(size, torch.SymInt):
+                continue
+            if not isinstance(sym_expr(size), sympy.Symbol):
+                # a derived input size, e.g. s0 + 1, is bucketed through its symbol
+                continue
+            names = symbol_names(size)
+            matched = [buckets[n] for n in sorted(names) if n in buckets]
+            if not matched:
+                log.info("shape bucket: %s is not declared, keep the graph dynamic", sorted(names))
+                return None
+            declared[sym_expr(size)] = matched[0]
+            if names & pad_safe:
+                safe.add(sym_expr(size))
+    if not declared:
+        return None
+    if mutated_inputs(gm):
+        log.info("shape bucket: the graph mutates its inputs, keep it dynamic")
+        return None
+    mixing = mixing_nodes(gm, set(declared) - safe)
+    if mixing:
+        log.info("shape bucket: %s mix padded elements, keep the graph dynamic", [n.name for n in mixing[:5]])
+        return None
+    return declared
+
+
+class BucketedGraph:
+    """
+    Run a dynamic shape graph as a set of static graphs.
+
+    Every symbol is rounded up to the nearest boundary declared for its
+    dim, a static graph is compiled per bucket on first use, inputs are
+    zero padded to the bucket shape and outputs are sliced back to the
+    actual shape. bucketed_symbols() decides whether a graph may be padded.
+    Shapes above the largest bucket run the dynamic graph.
+    """
+
+    def __init__(self, gm: torch.fx.GraphModule, compile_fn, buckets):
+        self.gm = gm
+        self.compile_fn = compile_fn
+        self.buckets = buckets
+        self.compiled = {}
+        self.dynamic_fn = None
+        self._boxed_call = True
+
+        placeholders = [n for n in gm.graph.nodes if n.op == 'placeholder']
+        self.input_vals = [n.meta.get('val', None) for n in placeholders]
+        output = next(n for n in reversed(gm.graph.nodes) if n.op == 'output')
+        self.output_vals = [n.meta.get('val', None) if isinstance(n, torch.fx.Node) else None
+                            for n in output.args[0]]
+
+        # where to read each symbol from: a symint input or a dim of a tensor input
+        self.symbol_sources = {}
+        for idx, val in enumerate(self.input_vals):
+            if isinstance(val, torch.SymInt) and isinstance(sym_expr(val), sympy.Symbol):
+                self.symbol_sources.setdefault(sym_expr(val), (idx, None))
+            elif isinstance(val, torch.Tensor):
+                for dim, size in enumerate(val.shape):
+                    if isinstance(sym_expr(size), sympy.Symbol):
+                        self.symbol_sources.setdefault(sym_expr(size), (idx, dim))
+        self.symbols = sorted(self.symbol_sources, key=str)
+
+    def _actual_values(self, args):
+        values = {}
+        for sym, (idx, dim) in self.symbol_sources.items():
+            values[sym] = int(args[idx]) if dim is None else args[idx].shape[dim]
+        return values
+
+    def _bucket_values(self, values):
+        bucketed = {}
+        for sym, value in values.items():
+            buckets = self.buckets[sym]
+            pos = bisect.bisect_left(buckets, value)
+            if pos == len(buckets):
+                return None
+            bucketed[sym] = buckets[pos]
+        return bucketed
+
+    @staticmethod
+    def _eval(size, values):
+        expr = sym_expr(size)
+        if expr is None:
+            return size
+        return int(expr.subs(values))
+
+    def _pad_args(self, args, bucketed):
+        padded = []
+        for arg, val in zip(args, self.input_vals):
+            if isinstance(val, torch.SymInt):
+                padded.append(self._eval(val, bucketed))
+            elif isinstance(val, torch.Tensor) and isinstance(arg, torch.Tensor):
+                shape = [self._eval(d, bucketed) for d in val.shape]
+                if list(arg.shape) != shape:
+                    out = arg.new_zeros(shape)
+                    out[tuple(slice(0, s) for s in arg.shape)].copy_(arg)
+                    arg = out
+                padded.append(arg)
+            else:
+                padded.append(arg)
+        return padded
+
+    def _specialize(self, padded):
+        # retrace the graph with concrete shapes, every symbol becomes a constant
+        fake_mode = FakeTensorMode(allow_non_fake_inputs=True)
+        fake_args = [fake_mode.from_tensor(a) if isinstance(a, torch.Tensor) else a for a in padded]
+        with fake_mode:
+            static_gm = make_fx(self.gm)(*fake_args)
+        return self.compile_fn(static_gm, fake_args)
+
+    def _slice_outputs(self, outputs, values):
+        results = []
+        for out, val in zip(outputs, self.output_vals):
+            if isinstance(val, torch.SymInt):
+                out = self._eval(val, values)
+            elif isinstance(val, torch.Tensor) and isinstance(out, torch.Tensor):
+                for dim, size in enumerate(val.shape):
+                    actual = self._eval(size, values)
+                    if out.shape[dim] != actual:
+                        out = out.narrow(dim, 0, actual)
+            results.append(out)
+        return results
+
+    def __call__(self, args):
+        values = self._actual_values(args)
+        bucketed = self._bucket_values(values)
+        if bucketed is None:
+            if self.dynamic_fn is None:
+                gm = torch.fx.GraphModule(self.gm, copy.deepcopy(self.gm.graph))
+                self.dynamic_fn = self.compile_fn(gm, self.input_vals)
+            return self.dynamic_fn(args)
+        key = tuple(bucketed[sym] for sym in self.symbols)
+        padded = self._pad_args(args, bucketed)
+        args.clear()
+        if key not in self.compiled:
+            self.compiled[key] = self._specialize(padded)
+        outputs = self.compiled[key](padded)
+        return self._slice_outputs(outputs, values)
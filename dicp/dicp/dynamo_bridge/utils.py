@@ -1,9 +1,11 @@
 import copy
+import re
 from pathlib import Path
 from typing import Any, Dict, Tuple, Union
 
 import torch.fx
 from torch._inductor.codecache import code_hash
+from torch._subclasses import FakeTensor, FakeTensorMode
 from torch.fx.node import Argument, Target
 
 
@@ -70,13 +72,86 @@ def merge_disjoint_set(set_num, idx_a, idx_b):
     return [root_a if find_root_num(set_num, s) == root_b else s for s in set_num]
 
 
-def save_cpu_gm(gm: torch.fx.GraphModule, folder: str):
+def graph_target_name(target):
+    if isinstance(target, str):
+        return target
+    if isinstance(target, torch._ops.OpOverload):
+        return str(target)
+    module = getattr(target, "__module__", None) or type(target).__module__
+    return f"{module}.{getattr(target, '__name__', type(target).__name__)}"
+
+
+def get_graph_key(gm: torch.fx.GraphModule):
+    # keyed on the structure of the graph, the fx names of its nodes do not matter
+    names = {}
+    lines = []
+    for node in gm.graph.nodes:
+        names[node] = canonical_node_name(node.name, len(names))
+        args = torch.fx.node.map_arg((node.args, node.kwargs), lambda n: names[n])
+        target = "" if node.op == 'placeholder' else graph_target_name(node.target)
+        lines.append(f"{names[node]} = {node.op} {target} {args}")
+    return code_hash("\n".join(lines))
+
+
+def canonical_node_name(name: str, index: int):
+    # fx names carry global counters (add_3, add_7), name nodes by position instead
+    # so structurally identical graphs generate identical code and share artifacts
+    return f"{re.sub(r'(_[0-9]+)+$', '', name)}_{index}"
+
+
+def fetch_attr(module: torch.nn.Module, target: str):
+    attr = module
+    for atom in target.split('.'):
+        attr = getattr(attr, atom)
+    return attr
+
+
+def lift_get_attrs(gm: torch.fx.GraphModule):
+    # tensor attributes become trailing placeholders of a copy of gm, the caller
+    # passes the attributes named by the returned targets after the graph inputs
+    gm = snapshot_gm(gm)
+    placeholders = [n for n in gm.graph.nodes if n.op == 'placeholder']
+    fake_mode = None
+    for n in placeholders:
+        if isinstance(n.meta.get('val', None), FakeTensor):
+            fake_mode = n.meta['val'].fake_mode
+            break
+    targets = []
+    for node in list(gm.graph.nodes):
+        if node.op != 'get_attr':
+            continue
+        attr = fetch_attr(gm, node.target)
+        if not isinstance(attr, torch.Tensor):
+            continue
+        if len(placeholders) > 0:
+            insert_point = gm.graph.inserting_after(placeholders[-1])
+        else:
+            insert_point = gm.graph.inserting_before(next(iter(gm.graph.nodes)))
+        with insert_point:
+            placeholder = gm.graph.placeholder(node.name)
+        placeholder.meta = dict(node.meta)
+        if fake_mode is None:
+            fake_mode = FakeTensorMode()
+        placeholder.meta['val'] = fake_mode.from_tensor(attr)
+        node.replace_all_uses_with(placeholder)
+        gm.graph.erase_node(node)
+        placeholders.append(placeholder)
+        targets.append(node.target)
+    if len(targets) > 0:
+        gm.recompile()
+    return gm, targets
+
+
+def snapshot_gm(gm: torch.fx.GraphModule):
+    # copy the graph only, parameters and buffers are shared with gm
+    return torch.fx.GraphModule(gm, copy.deepcopy(gm.graph))
+
+
+def save_cpu_gm(gm: torch.fx.GraphModule, folder: str, graph_key: str):
     Path(folder).mkdir(exist_ok=True)
     cpu_gm = copy_gm_to_cpu(gm)
-    grap_code = cpu_gm.code
-    graph_key = code_hash(grap_code)
     cpu_gm.to_folder(folder + "/" + graph_key[:4], module_name=graph_key)
-    return cpu_gm, graph_key
+    return cpu_gm
 
 
 def copy_gm_to_cpu(gm: torch.fx.GraphModule):
@@ -138,10 +213,12 @@ def get_cast_dtype(
 
 
 class TensorInfo:
-    def __init__(self, shape: list, dtype: torch.dtype, memory_format: torch.memory_format) -> None:
+    def __init__(self, shape: list, dtype: torch.dtype, memory_format: torch.memory_format, stride=None) -> None:
         self.shape = shape
         self.dtype = dtype
         self.memory_format = memory_format
+        # explicit strides take precedence over memory_format
+        self.stride = stride
 
 
 class DeviceParamToCpu(torch.fx.Transformer):
@@ -0,0 +1,207 @@
+import importlib
+import itertools
+import sys
+import types
+
+import pytest
+import torch
+
+# ascend ops import the acl runtime, an empty module is enough to build graphs
+try:
+    importlib.import_module("acl")
+except ImportError:
+    sys.modules["acl"] = types.ModuleType("acl")
+
+ACL_FLOAT = 0
+
+
+class FakeAcl(types.ModuleType):
+    """
+    Host-only stand-in for the acl runtime used by load_and_run: handles are
+    integers, live descs and config handles are tracked and every call of
+    interest is logged in `calls`.
+    """
+
+    def __init__(self, inputs=([2, 3],), outputs=([2, 3],), work_size=64, weight_size=8):
+        super().__init__("acl")
+        self.inputs = [list(d) for d in inputs]
+        self.outputs = [list(d) for d in outputs]
+        self.work_size = work_size
+        self.weight_size = weight_size
+        self.calls = []
+        self.descs = set()
+        self.config_handles = set()
+        self.handles = itertools.count(1)
+        self.mdl = types.SimpleNamespace(**{name: getattr(self, "mdl_" + name) for name in (
+            "create_dataset", "add_dataset_buffer", "query_size", "create_config_handle",
+            "set_config_opt", "destroy_config_handle", "load_with_config", "create_desc",
+            "get_desc", "destroy_desc", "unload", "get_num_inputs", "get_num_outputs",
+            "get_input_size_by_index", "get_output_size_by_index", "get_input_dims",
+            "get_input_data_type", "get_input_format", "get_output_data_type",
+            "get_output_dims", "set_dataset_tensor_desc", "execute", "execute_async")})
+        self.rt = types.SimpleNamespace(malloc=self.rt_malloc, free=lambda ptr: 0,
+                                        create_event=self.rt_create_event,
+                                        record_event=self.rt_record_event,
+                                        synchronize_event=self.rt_synchronize_event,
+                                        destroy_event=self.rt_destroy_event)
+
+    def log(self, name, *args):
+        self.calls.append((name, args))
+
+    def calls_of(self, name):
+        return [args for n, args in self.calls if n == name]
+
+    def create_data_buffer(self, ptr, size):
+        return next(self.handles)
+
+    def update_data_buffer(self, buf, ptr, size):
+        self.log("update_data_buffer", buf, ptr, size)
+        return 0
+
+    def create_tensor_desc(self, dtype, dims, fmt):
+        desc = next(self.handles)
+        self.descs.add(desc)
+        return desc
+
+    def destroy_tensor_desc(self, desc):
+        self.log("destroy_tensor_desc", desc)
+        self.descs.remove(desc)
+
+    def data_type_size(self, dtype):
+        return 4
+
+    def rt_malloc(self, size, policy):
+        return next(self.handles), 0
+
+    def rt_create_event(self):
+        return next(self.handles), 0
+
+    def rt_record_event(self, event, stream):
+        self.log("record_event", event, stream)
+        return 0
+
+    def rt_synchronize_event(self, event):
+        self.log("synchronize_event", event)
+        return 0
+
+    def rt_destroy_event(self, event):
+        return 0
+
+    def mdl_create_dataset(self):
+        return next(self.handles)
+
+    def mdl_add_dataset_buffer(self, dataset, buf):
+        return dataset, 0
+
+    def mdl_query_size(self, path):
+        return self.work_size, self.weight_size, 0
+
+    def mdl_create_config_handle(self):
+        handle = next(self.handles)
+        self.config_handles.add(handle)
+        return handle
+
+    def mdl_set_config_opt(self, handle, opt, value):
+        self.log("set_config_opt", handle, opt, value)
+        return 0
+
+    def mdl_destroy_config_handle(self, handle):
+        self.config_handles.remove(handle)
+        return 0
+
+    def mdl_load_with_config(self, handle):
+        return next(self.handles), 0
+
+    def mdl_create_desc(self):
+        return next(self.handles)
+
+    def mdl_get_desc(self, desc, model_id):
+        return 0
+
+    def mdl_destroy_desc(self, desc):
+        return 0
+
+    def mdl_unload(self, model_id):
+        self.log("unload", model_id)
+        return 0
+
+    def mdl_get_num_inputs(self, desc):
+        return len(self.inputs)
+
+    def mdl_get_num_outputs(self, desc):
+        return len(self.outputs)
+
+    def mdl_get_input_size_by_index(self, desc, idx):
+        return 4 * torch.Size(self.inputs[idx]).numel()
+
+    def mdl_get_output_size_by_index(self, desc, idx):
+        return 4 * torch.Size(self.outputs[idx]).numel()
+
+    def mdl_get_input_dims(self, desc, idx):
+        return {"dims": self.inputs[idx]}, 0
+
+    def mdl_get_input_data_type(self, desc, idx):
+        return ACL_FLOAT
+
+    def mdl_get_input_format(self, desc, idx):
+        return 2
+
+    def mdl_get_output_data_type(self, desc, idx):
+        return ACL_FLOAT
+
+    def mdl_get_output_dims(self, desc, idx):
+        return {"dims": self.outputs[idx]}, 0
+
+    def mdl_set_dataset_tensor_desc(self, dataset, desc, idx):
+        self.log("set_dataset_tensor_desc", dataset, desc, idx)
+        return dataset, 0
+
+    def mdl_execute(self, model_id, inputs, outputs):
+        self.log("execute", model_id, inputs, outputs)
+        return 0
+
+    def mdl_execute_async(self, model_id, inputs, outputs, stream):
+        self.log("execute_async", model_id, inputs, outputs, stream)
+        return 0
+
+
+class FakeStream:
+    def __init__(self, handle):
+        self.dipu_stream = handle
+        self.synchronized = 0
+
+    def synchronize(self):
+        self.synchronized += 1
+
+
+def fake_torch_dipu():
+    torch_dipu = types.ModuleType("torch_dipu")
+    torch_dipu.stream = FakeStream(1234)
+    torch_dipu.device_index = 0
+    torch_dipu.current_stream = lambda device=None: torch_dipu.stream
+    torch_dipu.current_device = lambda: torch_dipu.device_index
+    torch_dipu.dipu = types.SimpleNamespace(device=types.SimpleNamespace(__diputype__="cpu"),
+                                            empty_cache=lambda: None)
+    return torch_dipu
+
+
+@pytest.fixture
+def fake_acl(monkeypatch):
+    acl = FakeAcl()
+    monkeypatch.setitem(sys.modules, "acl", acl)
+    monkeypatch.setitem(sys.modules, "torch_dipu", fake_torch_dipu())
+    for name in ("load_and_run", "workspace", "buffer_pool"):
+        monkeypatch.delitem(sys.modules, f"dicp.vendor.AscendGraph.codegen.{name}", raising=False)
+    return acl
+
+
+@pytest.fixture
+def load_and_run(fake_acl):
+    # imported against the fake runtime, module level state is fresh per test
+    return importlib.import_module("dicp.vendor.AscendGraph.codegen.load_and_run")
+
+
+@pytest.fixture
+def opset_convert(monkeypatch):
+    monkeypatch.setitem(sys.modules, "torch_dipu", fake_torch_dipu())
+    return importlib.import_module("dicp.vendor.AscendGraph.opset_convert")
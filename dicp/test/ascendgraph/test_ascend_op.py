@@ -0,0 +1,27 @@
+import torch
+from torch._subclasses import FakeTensorMode
+
+from dicp.dynamo_bridge.operator import InferResultCache
+from dicp.vendor.AscendGraph import ascend_op
+
+
+class TestInferResult():
+    def setup_method(self):
+        InferResultCache.clear()
+
+    def test_transpose_permutes_shape(self):
+        with FakeTensorMode():
+            x = torch.empty(2, 3, 4, 5)
+        perm = ((0, 2, 3, 1), torch.int32, [4])
+        out = ascend_op.Transpose.get_singleton()(x, (perm, {}))
+        assert list(out.shape) == [2, 4, 5, 3] and out.is_contiguous()
+        out = ascend_op.Transpose.get_singleton()(x, [1, 0, 2, 3])
+        assert list(out.shape) == [3, 2, 4, 5]
+
+    def test_binary_broadcast(self):
+        with FakeTensorMode():
+            x = torch.empty(8, 1, 4, dtype=torch.float16)
+            y = torch.empty(3, 1, dtype=torch.float16)
+        out = ascend_op.Less.get_singleton()(x, y)
+        assert list(out.shape) == [8, 3, 4] and out.dtype == torch.bool
+        assert out.fake_mode is x.fake_mode
@@ -0,0 +1,81 @@
+import os
+import sys
+import textwrap
+import threading
+
+import pytest
+from torch._inductor import exc
+from dicp.vendor.AscendGraph.builder_service import GraphBuilderService
+
+
+@pytest.fixture
+def stub_builder(tmp_path):
+    # speaks the --serve protocol of graph_compile, the model is the builder's pid
+    script = tmp_path / "stub_builder.py"
+    script.write_text(textwrap.dedent("""
+        import os, sys, time
+        print("initialized", flush=True)
+        for line in sys.stdin:
+            output_path, graph_path = line.rstrip("\\n").split("\\t")
+            graph = open(graph_path).read()
+            if graph == "crash":
+                sys.exit(3)
+            if graph == "hang":
+                time.sleep(60)
+            ok = graph != "fail"
+            if ok:
+                with open(output_path + ".om", "w") as f:
+                    f.write(str(os.getpid()))
+            print("building", graph)
+            print("DICP_BUILD", "OK" if ok else "FAIL", output_path, flush=True)
+    """))
+    return [sys.executable, str(script)]
+
+
+def write_graph(tmp_path, name, content="graph"):
+    path = tmp_path / f"{name}.json"
+    path.write_text(content)
+    return str(path)
+
+
+class TestGraphBuilderService():
+    def test_builders_are_reused(self, tmp_path, stub_builder):
+        service = GraphBuilderService(stub_builder, workers=2)
+        outputs = [str(tmp_path / f"g{i}") for i in range(8)]
+        threads = [threading.Thread(target=service.build, args=(out, write_graph(tmp_path, i)))
+                   for i, out in enumerate(outputs)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        pids = {open(out + ".om").read() for out in outputs}
+        assert len(pids) <= 2 and len(service.processes) <= 2
+        service.close()
+
+    def test_failed_build(self, tmp_path, stub_builder):
+        service = GraphBuilderService(stub_builder, workers=1)
+        with pytest.raises(exc.CppCompileError, match="building fail"):
+            service.build(str(tmp_path / "a"), write_graph(tmp_path, "a", "fail"))
+        # the builder survives a failed graph
+        service.build(str(tmp_path / "b"), write_graph(tmp_path, "b"))
+        assert len(service.processes) == 1
+
+        crashed, = service.processes
+        with pytest.raises(exc.CppCompileError, match="exited with 3"):
+            service.build(str(tmp_path / "c"), write_graph(tmp_path, "c", "crash"))
+        assert service.processes == []
+        service.build(str(tmp_path / "d"), write_graph(tmp_path, "d"))
+        # the dead builder is closed and dropped, not kept next to its replacement
+        assert len(service.processes) == 1 and service.processes[0] is not crashed
+        assert crashed.proc.stdout.closed
+        assert os.path.exists(str(tmp_path / "d.om"))
+        service.close()
+
+    def test_timeout_kills_builder(self, tmp_path, stub_builder):
+        service = GraphBuilderService(stub_builder, workers=1)
+        with pytest.raises(exc.CppCompileError, match="timed out"):
+            service.build(str(tmp_path / "a"), write_graph(tmp_path, "a", "hang"), timeout=1)
+        assert service.processes == []
+        service.build(str(tmp_path / "b"), write_graph(tmp_path, "b"))
+        assert len(service.processes) == 1
+        service.close()
@@ -0,0 +1,27 @@
+import torch
+from torch.fx.experimental.proxy_tensor import make_fx
+
+from dicp.vendor.AscendGraph.codegen.ascend import AscendCodegen
+
+
+def gen_call_func(opset_convert, fn, *shapes):
+    gm = make_fx(fn, tracing_mode="symbolic")(*[torch.randn(shape) for shape in shapes])
+    codegen = AscendCodegen(opset_convert.ascendgraph_opset_convert(gm))
+    codegen.run()
+    return codegen.gen_call_func()
+
+
+class TestCallFunc():
+    def test_dynamic_shapes_built_once(self, opset_convert):
+        code = gen_call_func(opset_convert, lambda x, y: (torch.relu(x) + 1, x.sum(-1) * y), [4, 3], [4])
+        call = code[code.index("def call(args):"):]
+        # call() only reads the symbols, the shape lists come from call_shapes
+        assert "call_shapes(s0, s1)" in call
+        for name in ("dims", "output_shape", "out_stride", "out_storage_offset"):
+            assert f"    {name} = " not in call
+
+        scope = {"functools": __import__("functools")}
+        exec(code[:code.index("int_args = ")], scope)
+        dims, output_shape, out_stride, _ = scope["call_shapes"](5, 3)
+        assert (dims, output_shape, out_stride) == ({0: [5, 3], 1: [5]}, [[5, 3], [5]], [[3, 1], [1]])
+        assert scope["call_shapes"](5, 3)[1] is output_shape
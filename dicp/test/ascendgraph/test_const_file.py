@@ -0,0 +1,88 @@
+import os
+
+import torch
+from torch._inductor.codecache import invalid_vec_isa
+
+from dicp.vendor.AscendGraph import compile_job
+from dicp.vendor.AscendGraph.codegen import ascend
+from dicp.vendor.AscendGraph.codegen.ascend import AscendCodegen, AscendOverrides
+
+
+def gen_const_file(nodes):
+    codegen = AscendCodegen.__new__(AscendCodegen)
+    codegen.common_nodes = nodes
+    return codegen.gen_const_file()
+
+
+def tensor_attr(node):
+    attr, = node["attrs"]
+    return attr
+
+
+def fake_model(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return path
+
+
+class TestConstFile():
+    def test_inline_and_sidecar(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ascend, "cache_dir", lambda: str(tmp_path))
+        monkeypatch.setattr(ascend, "const_inline_max", 4)
+        small = torch.arange(4, dtype=torch.float32)
+        weights = [torch.randn(5, dtype=torch.float16), torch.randn(3, 7), torch.arange(9, dtype=torch.int64)]
+        nodes = [AscendOverrides.get_const_attr("small", small)]
+        nodes += [AscendOverrides.get_const_attr(f"w{i}", w) for i, w in enumerate(weights)]
+        nodes.append(AscendOverrides.Const("shape", list(range(6)), torch.int32))
+
+        path = gen_const_file(nodes)
+        assert tensor_attr(nodes[0])["tensor_value"] == small.tolist()
+        assert "tensor_offset" not in tensor_attr(nodes[0])
+
+        data = open(path, "rb").read()
+        expected = weights + [torch.arange(6, dtype=torch.int32)]
+        for node, value in zip(nodes[1:], expected):
+            attr = tensor_attr(node)
+            assert "tensor_value" not in attr
+            assert attr["tensor_offset"] % ascend.CONST_FILE_ALIGNMENT == 0
+            assert attr["tensor_nbytes"] == value.numel() * value.element_size()
+            raw = bytearray(data[attr["tensor_offset"]:attr["tensor_offset"] + attr["tensor_nbytes"]])
+            assert torch.equal(torch.frombuffer(raw, dtype=value.dtype).reshape(value.shape), value)
+
+    def test_existing_file_is_reused(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ascend, "cache_dir", lambda: str(tmp_path))
+        monkeypatch.setattr(ascend, "const_inline_max", 4)
+        weight = torch.randn(16)
+        path = gen_const_file([AscendOverrides.get_const_attr("w", weight)])
+        os.utime(path, (0, 0))
+        written = []
+        monkeypatch.setattr(ascend.os, "replace", lambda src, dst: written.append(dst))
+        assert gen_const_file([AscendOverrides.get_const_attr("w", weight)]) == path
+        assert written == []
+        assert os.path.getmtime(path) > 0
+
+    def test_prune_least_recently_used(self, tmp_path):
+        for i, name in enumerate(["a.bin", "b.bin", "c.bin"]):
+            path = tmp_path / name
+            path.write_bytes(b"\0" * 100)
+            os.utime(path, (i, i))
+        ascend.prune_const_dir(str(tmp_path), keep={str(tmp_path / "a.bin")}, max_size=200)
+        assert sorted(os.listdir(tmp_path)) == ["a.bin", "c.bin"]
+
+    def test_pending_builds_keep_their_files(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ascend, "const_cache_size", 200)
+        monkeypatch.setattr(compile_job, "pick_vec_isa", lambda: invalid_vec_isa)
+        monkeypatch.setattr(compile_job.artifact_cache, "fetch", lambda key, path, build_fn: fake_model(path))
+        paths = []
+        for i, name in enumerate(["a.bin", "b.bin", "c.bin"]):
+            path = tmp_path / name
+            path.write_bytes(b"\0" * 100)
+            os.utime(path, (i, i))
+            paths.append(str(path))
+        # the oldest file is read by a graph waiting for its build
+        waiting = compile_job.AscendCompileJob('{"name": "a"}', const_file=paths[0])
+        compile_job.AscendCompileJob('{"name": "c"}', const_file=paths[2]).build()
+        assert sorted(os.listdir(tmp_path)) == ["a.bin", "c.bin"]
+        waiting.build()
+        assert compile_job.pending_const_files == {}
+        assert sorted(os.listdir(tmp_path)) == ["a.bin", "c.bin"]
@@ -0,0 +1,78 @@
+import torch
+import torch.fx
+
+from dicp.vendor.AscendGraph import ascend_op
+from dicp.vendor.AscendGraph.graph_cleanup import GraphCleanupPass
+
+
+def call(graph, op, *args):
+    node = graph.call_function(op.get_singleton(), args)
+    if op is ascend_op.Const:
+        node.meta['val'] = (args, {})
+    return node
+
+
+def targets(gm):
+    return [type(n.target).__name__ for n in gm.graph.nodes if n.op == 'call_function']
+
+
+class TestGraphCleanup():
+    def test_pool_consts_and_cse(self):
+        graph = torch.fx.Graph()
+        x = graph.placeholder("x")
+        one_a = call(graph, ascend_op.Const, [1.0], torch.float32, [])
+        one_b = call(graph, ascend_op.Const, [1.0], torch.float32, [])
+        # same values with another dtype stay separate
+        one_int = call(graph, ascend_op.Const, [1], torch.int32, [])
+        add_a = call(graph, ascend_op.Add, x, one_a)
+        add_b = call(graph, ascend_op.Add, x, one_b)
+        mul = call(graph, ascend_op.Mul, add_a, add_b)
+        call(graph, ascend_op.Mul, mul, one_int)
+        graph.output((mul,))
+        gm = GraphCleanupPass().transform(torch.fx.GraphModule(torch.nn.Module(), graph))
+
+        assert targets(gm) == ["Const", "Add", "Mul"]
+        mul = [n for n in gm.graph.nodes if n.name.startswith("mul")][0]
+        assert mul.args[0] is mul.args[1]
+
+    def test_fold_reshape_of_const(self):
+        graph = torch.fx.Graph()
+        x = graph.placeholder("x")
+        value = call(graph, ascend_op.Const, [1, 2, 3, 4, 5, 6], torch.int32, [6])
+        shape = call(graph, ascend_op.Const, [2, -1], torch.int32, [2])
+        reshape = call(graph, ascend_op.Reshape, value, shape)
+        unsqueeze = call(graph, ascend_op.Unsqueeze, reshape, [0])
+        add = call(graph, ascend_op.Add, x, unsqueeze)
+        graph.output((add,))
+        gm = GraphCleanupPass().transform(torch.fx.GraphModule(torch.nn.Module(), graph))
+
+        assert targets(gm) == ["Const", "Add"]
+        const = [n for n in gm.graph.nodes if n.op == 'call_function'][0]
+        assert const.args[:3] == ([1, 2, 3, 4, 5, 6], torch.int32, [1, 2, 3])
+
+    def test_keep_random_and_output_nodes(self):
+        graph = torch.fx.Graph()
+        x = graph.placeholder("x")
+        shape = call(graph, ascend_op.Const, [4], torch.int32, [1])
+        rand_a = call(graph, ascend_op.StatelessRandomUniformV2, shape, x, x, torch.float32)
+        rand_b = call(graph, ascend_op.StatelessRandomUniformV2, shape, x, x, torch.float32)
+        abs_a = call(graph, ascend_op.Relu, x)
+        abs_b = call(graph, ascend_op.Relu, x)
+        graph.output((rand_a, rand_b, abs_a, abs_b))
+        gm = GraphCleanupPass().transform(torch.fx.GraphModule(torch.nn.Module(), graph))
+
+        assert targets(gm) == ["Const", "StatelessRandomUniformV2", "StatelessRandomUniformV2", "Relu", "Relu"]
+
+    def test_recompile_only_when_changed(self, monkeypatch):
+        recompiled = []
+        monkeypatch.setattr(torch.fx.GraphModule, "recompile", lambda gm: recompiled.append(gm))
+        graph = torch.fx.Graph()
+        x = graph.placeholder("x")
+        graph.output((call(graph, ascend_op.Relu, x),))
+        gm = torch.fx.GraphModule(torch.nn.Module(), graph)
+        recompiled.clear()
+        GraphCleanupPass().transform(gm)
+        assert recompiled == []
+        # a graph rewritten by the layout pass is regenerated here
+        GraphCleanupPass().transform(gm, changed=True)
+        assert recompiled == [gm]
@@ -0,0 +1,134 @@
+import torch
+import torch.fx
+from torch._subclasses.fake_tensor import FakeTensorMode
+
+from dicp.vendor.AscendGraph import ascend_op
+from dicp.vendor.AscendGraph.layout_pass import LayoutPass
+
+
+def matmul(x1, x2, adj_x1=False, adj_x2=False, keep_dtype=1):
+    x1 = x1.transpose(-1, -2) if adj_x1 else x1
+    x2 = x2.transpose(-1, -2) if adj_x2 else x2
+    return x1 @ x2
+
+
+# torch reference of the ascend ops used below
+reference = {
+    ascend_op.Const: lambda param, dtype, shape, fmt="ND": torch.tensor(param, dtype=dtype).reshape(shape),
+    ascend_op.Permute: lambda x, order: x.permute(order),
+    ascend_op.Transpose: lambda x, perm: x.permute(perm.tolist()),
+    ascend_op.Reshape: lambda x, shape: x.reshape(shape.tolist()),
+    ascend_op.Identity: lambda x, idx=None: x,
+    ascend_op.Muls: lambda x, value: x * value,
+    ascend_op.Relu: torch.relu,
+    ascend_op.Add: torch.add,
+    ascend_op.BatchMatMul: matmul,
+    ascend_op.MatMul: matmul,
+}
+
+
+class Reference(torch.fx.Interpreter):
+    def call_function(self, target, args, kwargs):
+        return reference[type(target)](*args, **kwargs)
+
+
+def build(fn, *shapes):
+    graph = torch.fx.Graph()
+    inputs = [graph.placeholder(f"x{i}") for i in range(len(shapes))]
+    graph.output(fn(graph, *inputs))
+    gm = torch.fx.GraphModule(torch.nn.Module(), graph)
+    # meta of every node from the reference ops on fake tensors
+    with FakeTensorMode():
+        args = [torch.empty(shape) for shape in shapes]
+    interp = Reference(gm, garbage_collect_values=False)
+    interp.run(*args)
+    for node in gm.graph.nodes:
+        if node.op == 'output':
+            continue
+        if isinstance(node.target, ascend_op.Const):
+            node.meta['val'] = (node.args, node.kwargs)
+        else:
+            node.meta['val'] = interp.env[node]
+    return gm
+
+
+def call(graph, op, *args):
+    return graph.call_function(op.get_singleton(), args)
+
+
+def const(graph, value):
+    return call(graph, ascend_op.Const, value, torch.int32, [len(value)])
+
+
+def count(gm, *ops):
+    return len([n for n in gm.graph.nodes if n.op == 'call_function' and isinstance(n.target, ops)])
+
+
+def check(gm, *shapes):
+    args = [torch.randn(shape) for shape in shapes]
+    expected = Reference(gm).run(*args)
+    LayoutPass().transform(gm)
+    actual = Reference(gm).run(*args)
+    for e, a in zip(expected, actual):
+        assert torch.allclose(e, a)
+    return gm
+
+
+class TestLayoutPass():
+    def test_fold_transpose_into_bmm(self):
+        # q @ k.transpose(-1, -2) * scale as converted from attention
+        def fn(graph, q, k):
+            kt = call(graph, ascend_op.Transpose, k, const(graph, [0, 1, 3, 2]))
+            kt = call(graph, ascend_op.Muls, kt, 0.125)
+            kt = call(graph, ascend_op.Identity, kt, None)
+            kt = call(graph, ascend_op.Reshape, kt, const(graph, [6, 8, 5]))
+            q = call(graph, ascend_op.Reshape, q, const(graph, [6, 5, 8]))
+            return (call(graph, ascend_op.BatchMatMul, q, kt, False, False),)
+        gm = check(build(fn, [2, 3, 5, 8], [2, 3, 5, 8]), [2, 3, 5, 8], [2, 3, 5, 8])
+
+        assert count(gm, ascend_op.Permute, ascend_op.Transpose) == 0
+        bmm = [n for n in gm.graph.nodes if isinstance(n.target, ascend_op.BatchMatMul)][0]
+        assert bmm.args[2:] == (False, True)
+
+    def test_fold_transpose_into_4d_bmm(self):
+        # [b, h, s, d] attention scores, q @ k.transpose(2, 3)
+        def fn(graph, q, k):
+            kt = call(graph, ascend_op.Permute, k, [0, 1, 3, 2])
+            return (call(graph, ascend_op.BatchMatMul, q, kt, False, False),)
+        gm = check(build(fn, [2, 3, 5, 8], [2, 3, 7, 8]), [2, 3, 5, 8], [2, 3, 7, 8])
+
+        assert count(gm, ascend_op.Permute) == 0
+        bmm = [n for n in gm.graph.nodes if isinstance(n.target, ascend_op.BatchMatMul)][0]
+        assert bmm.args[2:] == (False, True)
+
+    def test_fold_transpose_into_matmul(self):
+        def fn(graph, x, y):
+            yt = call(graph, ascend_op.Permute, y, [1, 0])
+            return (call(graph, ascend_op.MatMul, x, yt, False, False),)
+        gm = check(build(fn, [4, 8], [6, 8]), [4, 8], [6, 8])
+        assert count(gm, ascend_op.Permute) == 0
+
+    def test_cancel_inverse_permutes(self):
+        def fn(graph, x, y):
+            t = call(graph, ascend_op.Permute, x, [0, 2, 1, 3])
+            t = call(graph, ascend_op.Relu, t)
+            t = call(graph, ascend_op.Permute, t, [0, 2, 1, 3])
+            return (call(graph, ascend_op.Add, t, y),)
+        gm = check(build(fn, [2, 3, 4, 5], [2, 3, 4, 5]), [2, 3, 4, 5], [2, 3, 4, 5])
+        assert count(gm, ascend_op.Permute) == 0
+
+    def test_merge_permutes_of_binary_op(self):
+        def fn(graph, x, y):
+            a = call(graph, ascend_op.Permute, x, [2, 0, 1])
+            b = call(graph, ascend_op.Permute, y, [2, 0, 1])
+            return (call(graph, ascend_op.Add, a, b),)
+        gm = check(build(fn, [2, 3, 4], [2, 3, 4]), [2, 3, 4], [2, 3, 4])
+        assert count(gm, ascend_op.Permute) == 1
+
+    def test_keep_permute_of_output_and_broadcast(self):
+        def fn(graph, x, y):
+            t = call(graph, ascend_op.Permute, x, [1, 0])
+            # y broadcasts against the permuted shape only
+            return (t, call(graph, ascend_op.Add, call(graph, ascend_op.Permute, x, [1, 0]), y))
+        gm = check(build(fn, [3, 4], [4, 1]), [3, 4], [4, 1])
+        assert count(gm, ascend_op.Permute) == 2
@@ -0,0 +1,115 @@
+import torch
+
+
+def run_with_dims(exe, dims):
+    return exe.run([torch.randn(dims)], dims={0: dims}, output_shape=[dims])
+
+
+class TestInputDescCache():
+    def test_reuse_and_evict(self, load_and_run, fake_acl, monkeypatch):
+        monkeypatch.setattr(load_and_run, "input_desc_cache_size", 2)
+        exe = load_and_run.AscendExecutor(0, "graph.om")
+        for dims in ([1, 3], [2, 3], [1, 3]):
+            run_with_dims(exe, dims)
+        # [1, 3] is hit the second time
+        assert len(fake_acl.descs) == 2
+        assert fake_acl.calls_of("destroy_tensor_desc") == []
+
+        used = [args[1] for args in fake_acl.calls_of("set_dataset_tensor_desc")]
+        assert used[0] == used[2] != used[1]
+
+        # [2, 3] is the least recently used desc
+        run_with_dims(exe, [3, 3])
+        assert fake_acl.calls_of("destroy_tensor_desc") == [(used[1],)]
+        assert list(exe.input_descs[0]) == [(1, 3), (3, 3)]
+
+    def test_release_destroys_descs(self, load_and_run, fake_acl):
+        exe = load_and_run.AscendExecutor(0, "graph.om")
+        for dims in ([1, 3], [2, 3]):
+            run_with_dims(exe, dims)
+        assert len(fake_acl.descs) == 2
+        exe.release_resource()
+        assert fake_acl.descs == set()
+
+
+class TestOutputPool():
+    def test_release_outputs(self, load_and_run, monkeypatch):
+        monkeypatch.setattr(load_and_run, "reuse_output_buffers", True)
+        exe = load_and_run.AscendExecutor(0, "graph.om")
+        out, = exe.run([torch.randn(2, 3)])
+        ptr = out.data_ptr()
+        del out
+        # dropping an output does not recycle it
+        kept, = exe.run([torch.randn(2, 3)])
+        assert kept.data_ptr() != ptr
+        load_and_run.release_outputs(kept)
+        assert exe.run([torch.randn(2, 3)])[0].data_ptr() == kept.data_ptr()
+
+
+class TestAsyncExecute():
+    def test_launch_on_current_stream(self, load_and_run, fake_acl, monkeypatch):
+        monkeypatch.setattr(load_and_run, "async_execute", True)
+        recorded = []
+        monkeypatch.setattr(torch.Tensor, "record_stream", lambda t, stream: recorded.append((t, stream)))
+        stream = load_and_run.torch_dipu.stream
+        exe = load_and_run.AscendExecutor(0, "graph.om")
+        x = torch.randn(2, 3)
+        out, = exe.run([x])
+
+        (_, inputs, outputs, launch_stream), = fake_acl.calls_of("execute_async")
+        assert launch_stream == stream.dipu_stream
+        assert fake_acl.calls_of("execute") == []
+        assert [(t.data_ptr(), s) for t, s in recorded] == [(x.data_ptr(), stream), (out.data_ptr(), stream)]
+
+        # the next run fills the other datasets without waiting
+        exe.run([x])
+        second = fake_acl.calls_of("execute_async")[1]
+        assert second[1:3] != (inputs, outputs)
+        assert fake_acl.calls_of("synchronize_event") == []
+
+        # the first datasets are reused once their launch has ended
+        exe.run([x])
+        first_event = fake_acl.calls_of("record_event")[0][0]
+        assert fake_acl.calls_of("synchronize_event") == [(first_event,)]
+        assert fake_acl.calls_of("execute_async")[2][1:3] == (inputs, outputs)
+
+    def test_evicted_desc_outlives_queued_launches(self, load_and_run, fake_acl, monkeypatch):
+        monkeypatch.setattr(load_and_run, "async_execute", True)
+        monkeypatch.setattr(load_and_run, "input_desc_cache_size", 1)
+        monkeypatch.setattr(torch.Tensor, "record_stream", lambda t, stream: None)
+        exe = load_and_run.AscendExecutor(0, "graph.om")
+        run_with_dims(exe, [1, 3])
+        run_with_dims(exe, [2, 3])
+        # the desc of [1, 3] is evicted but the first launch may still read it
+        assert fake_acl.calls_of("destroy_tensor_desc") == []
+        run_with_dims(exe, [2, 3])
+        assert fake_acl.calls_of("destroy_tensor_desc") == []
+        run_with_dims(exe, [2, 3])
+        assert len(fake_acl.calls_of("destroy_tensor_desc")) == 1
+        exe.release_resource()
+        assert fake_acl.descs == set()
+
+    def test_reload_waits_for_queued_launches(self, load_and_run, fake_acl, monkeypatch):
+        monkeypatch.setattr(load_and_run, "async_execute", True)
+        monkeypatch.setattr(torch.Tensor, "record_stream", lambda t, stream: None)
+        exe = load_and_run.AscendExecutor(0, "graph.om")
+        model_id = exe.model_id
+        for _ in range(2):
+            exe.run([torch.randn(2, 3)])
+        # a new workspace unloads the model the two launches are queued on
+        load_and_run.empty_cache()
+        exe.run([torch.randn(2, 3)])
+        events = [args[0] for args in fake_acl.calls_of("record_event")]
+        unload = fake_acl.calls.index(("unload", (model_id,)))
+        waited = [args[0] for name, args in fake_acl.calls[:unload] if name == "synchronize_event"]
+        assert sorted(waited) == sorted(events[:2])
+
+
+class TestModelLoad():
+    def test_config_handles_destroyed(self, load_and_run, fake_acl):
+        exe = load_and_run.AscendExecutor(0, "graph.om")
+        # a new workspace makes the model reload before its next run
+        load_and_run.empty_cache()
+        exe.run([torch.randn(2, 3)])
+        assert len(fake_acl.calls_of("set_config_opt")) == 14
+        assert fake_acl.config_handles == set()
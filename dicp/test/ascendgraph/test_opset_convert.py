@@ -0,0 +1,48 @@
+import torch
+from torch._subclasses.fake_tensor import FakeTensorMode
+from torch.fx.experimental.proxy_tensor import make_fx
+
+from dicp.vendor.AscendGraph import ascend_op
+
+
+def trace(fn, *shapes):
+    with FakeTensorMode():
+        args = [torch.empty(shape) for shape in shapes]
+    return make_fx(fn, tracing_mode="fake")(*args)
+
+
+def count(gm, *ops):
+    return len([n for n in gm.graph.nodes if n.op == 'call_function' and isinstance(n.target, ops)])
+
+
+class TestOpsetConvert():
+    def test_recompile_once(self, opset_convert, monkeypatch):
+        recompiled = []
+        recompile = torch.fx.GraphModule.recompile
+
+        def counted(self):
+            recompiled.append(self)
+            return recompile(self)
+
+        gm = trace(lambda x, w: (torch.relu(torch.bmm(x, w.transpose(1, 2))),), [2, 3, 5], [2, 4, 5])
+        monkeypatch.setattr(torch.fx.GraphModule, "recompile", counted)
+        gm = opset_convert.ascendgraph_opset_convert(gm)
+        assert count(gm, ascend_op.Permute, ascend_op.Transpose) == 0
+        assert "Permute" not in gm.code and "Transpose" not in gm.code
+        # once when the conversion builds the module, once after the graph passes
+        assert len([m for m in recompiled if m is gm]) == 2
+
+    def test_graph_cleanup(self, opset_convert, monkeypatch):
+        def fn(x):
+            return (x.view(6) + 1, x.view(6) * 2)
+
+        monkeypatch.setattr(opset_convert, "graph_cleanup", False)
+        gm = opset_convert.ascendgraph_opset_convert(trace(fn, [2, 3]))
+        assert count(gm, ascend_op.Reshape) == 2
+        monkeypatch.setattr(opset_convert, "graph_cleanup", True)
+        gm = opset_convert.ascendgraph_opset_convert(trace(fn, [2, 3]))
+        # the shape consts are pooled, then the reshapes of x are merged
+        assert count(gm, ascend_op.Reshape) == 1
+        shapes = [n for n in gm.graph.nodes if isinstance(n.target, ascend_op.Const) and n.args[0] == [6]]
+        assert len(shapes) == 1
+        assert gm.code.count("ascend_op_Reshape(") == 1
@@ -0,0 +1,59 @@
+import sys
+import types
+
+import torch
+from dicp.vendor.AscendGraph.codegen.buffer_pool import OutputBufferPool, _symint_tensor, symint_tensor
+
+
+class TestOutputBufferPool():
+    def test_dropped_outputs_are_not_reused(self):
+        pool = OutputBufferPool("cpu")
+        out = pool.acquire([2, 3], torch.float32)
+        ptr = out.data_ptr()
+        # e.g. saved for backward, invisible to python reference counts
+        saved = out.view(-1)
+        del out, saved
+        assert pool.acquire([2, 3], torch.float32).data_ptr() != ptr
+        assert (pool.hits, pool.misses) == (0, 2)
+
+    def test_capacity(self):
+        pool = OutputBufferPool("cpu", capacity=2)
+        outs = [pool.acquire([4], torch.float32) for _ in range(3)]
+        pool.release(*outs)
+        # the third output is beyond the capacity and never pooled
+        assert pool.released == {outs[0].data_ptr(), outs[1].data_ptr()}
+        assert {pool.acquire([4], torch.float32).data_ptr() for _ in range(2)} == pool.owned
+        assert pool.acquire([8], torch.float32).shape == (8,)
+
+    def test_explicit_release(self):
+        pool = OutputBufferPool("cpu")
+        out = pool.acquire([2], torch.float16)
+        pool.release(out, torch.empty(2))
+        assert pool.acquire([2], torch.float16).data_ptr() == out.data_ptr()
+        assert pool.released == set()
+
+    def test_least_recently_used_key_evicted(self):
+        pool = OutputBufferPool("cpu", max_keys=2)
+        a = pool.acquire([1], torch.float32)
+        b = pool.acquire([2], torch.float32)
+        pool.release(a, b)
+        assert pool.acquire([1], torch.float32).data_ptr() == a.data_ptr()
+        # [2] is the least recently used key
+        pool.acquire([3], torch.float32)
+        assert list(pool.buffers) == [((1,), torch.float32), ((3,), torch.float32)]
+        assert b.data_ptr() not in pool.owned and pool.released == set()
+        pool.release(b)
+        assert pool.acquire([2], torch.float32).data_ptr() != b.data_ptr()
+
+
+class TestSymintTensor():
+    def test_keyed_on_current_device(self, monkeypatch):
+        torch_dipu = types.SimpleNamespace(current_device=lambda: 0)
+        monkeypatch.setitem(sys.modules, "torch_dipu", torch_dipu)
+        _symint_tensor.cache_clear()
+        symint_tensor(7, "meta")
+        symint_tensor(7, "meta")
+        torch_dipu.current_device = lambda: 1
+        symint_tensor(7, "meta")
+        assert _symint_tensor.cache_info()[:2] == (1, 2)
+        assert int(symint_tensor(5, "cpu")) == 5
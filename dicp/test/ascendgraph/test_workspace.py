@@ -0,0 +1,55 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+model_sizes = {}
+
+
+@pytest.fixture
+def workspace(monkeypatch):
+    acl = types.ModuleType("acl")
+    acl.mdl = types.SimpleNamespace(query_size=lambda path: (*model_sizes[path], 0))
+    monkeypatch.setitem(sys.modules, "acl", acl)
+    monkeypatch.delitem(sys.modules, "dicp.vendor.AscendGraph.codegen.workspace", raising=False)
+    module = importlib.import_module("dicp.vendor.AscendGraph.codegen.workspace")
+    yield module.WorkspaceManager("cpu")
+    model_sizes.clear()
+
+
+class TestWorkspaceManager():
+    def test_sized_to_largest_model(self, workspace):
+        model_sizes.update({"a.om": (64, 8), "b.om": (256, 8), "c.om": (128, 8)})
+        assert workspace.reserve(0, "a.om") == (64, 8)
+        _, size, generation = workspace.acquire()
+        assert (size, generation) == (64, 1)
+
+        workspace.reserve(1, "b.om")
+        ptr, size, generation = workspace.acquire()
+        assert (size, generation) == (256, 2)
+
+        # smaller models share the current buffer
+        workspace.reserve(2, "c.om")
+        assert workspace.acquire() == (ptr, 256, 2)
+
+    def test_release(self, workspace):
+        model_sizes.update({"a.om": (64, 8), "b.om": (256, 8)})
+        workspace.reserve(0, "a.om")
+        workspace.reserve(1, "b.om")
+        workspace.acquire()
+        workspace.unregister(1)
+        workspace.release()
+        assert (workspace.size, workspace.generation) == (0, 2)
+        # reallocated to what the remaining models need
+        _, size, generation = workspace.acquire()
+        assert (size, generation) == (64, 3)
+
+    def test_dynamic_shape_models(self, workspace, monkeypatch):
+        monkeypatch.setattr(sys.modules[type(workspace).__module__], "dynamic_workspace_size", 512)
+        model_sizes.update({"a.om": (64, 8), "dynamic.om": (0, 8)})
+        workspace.reserve(0, "a.om")
+        # query_size reports 0 when the size is only known at run time
+        assert workspace.reserve(1, "dynamic.om") == (0, 8)
+        _, size, _ = workspace.acquire()
+        assert size == 512
@@ -0,0 +1,88 @@
+"""
+Host overhead of a generated ascendgraph call().
+
+A small static and a small dynamic shape graph are compiled with the device
+kernel replaced by one that returns preallocated outputs, so the time per
+call is the python work done around the kernel launch:
+
+    python bench_call.py --iters 10000 --budget-us 30
+"""
+import argparse
+import sys
+import time
+
+import torch
+from torch.fx.experimental.proxy_tensor import make_fx
+
+from bench_compile import install_device_stubs
+
+
+def stub_kernel():
+    from dicp.dynamo_bridge.compile import AsyncCompileKernel
+    outputs = [torch.empty(8, 16) for _ in range(4)]
+
+    def compile_kernel(self, device_compile_job):
+        device_compile_job.get_key()
+        return lambda args, dims, output_shape, out_stride, *rest: outputs[:len(out_stride)]
+    AsyncCompileKernel.compile_kernel = compile_kernel
+
+
+def small_graph(x, w, b):
+    return (torch.relu(torch.matmul(x, w) + b),)
+
+
+def small_graph_symint(x, w, b):
+    n = x.size(0)
+    return (torch.relu(torch.matmul(x, w) + b).view(n, 16), n + 1)
+
+
+CASES = {
+    "static": (small_graph, "real"),
+    "dynamic": (small_graph_symint, "symbolic"),
+}
+
+
+def compile_case(name):
+    from dicp.dynamo_bridge.compile_fx import compile_fx_inner, get_decompositions
+    fn, tracing_mode = CASES[name]
+    inputs = [torch.empty(8, 16), torch.empty(16, 16), torch.empty(16)]
+    gm = make_fx(fn, decomposition_table=get_decompositions("ascendgraph"), tracing_mode=tracing_mode)(*inputs)
+    example_inputs = [n.meta["val"] for n in gm.graph.nodes if n.op == "placeholder"]
+    compiled = compile_fx_inner(gm, example_inputs, graph_id=f"call_{name}", backend="ascendgraph")
+    # runtime arguments: symint placeholders receive python ints
+    return compiled, [int(v) if isinstance(v, torch.SymInt) else inputs[i]
+                      for i, v in enumerate(example_inputs)]
+
+
+def bench(compiled, args, iters):
+    compiled(list(args))
+    start = time.perf_counter()
+    for _ in range(iters):
+        compiled(list(args))
+    return (time.perf_counter() - start) / iters * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="host overhead of a generated ascendgraph call()")
+    parser.add_argument("--iters", type=int, default=10000)
+    parser.add_argument("--budget-us", type=float, default=None,
+                        help="fail when a call takes longer than this many microseconds")
+    args = parser.parse_args()
+
+    install_device_stubs()
+    stub_kernel()
+    over_budget = []
+    print(f"{'graph':<12}{'us/call':>10}")
+    for name in CASES:
+        compiled, call_args = compile_case(name)
+        cost = bench(compiled, call_args, args.iters)
+        print(f"{name:<12}{cost:>10.2f}")
+        if args.budget_us is not None and cost > args.budget_us:
+            over_budget.append(name)
+    if over_budget:
+        print(f"over budget of {args.budget_us}us: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
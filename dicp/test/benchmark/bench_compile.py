@@ -0,0 +1,256 @@
+"""
+CPU-only compile time of the dicp pipeline.
+
+Synthetic aten graphs are converted, inferred and code generated for each
+backend, device compile jobs are stubbed out. Compare against the stored
+baseline with a regression threshold, or store a new one:
+
+    python bench_compile.py --sizes 100 1000 --threshold 0.2
+    python bench_compile.py --save-baseline
+
+Runs from a source checkout, dicp does not need to be installed. Totals
+are only comparable to a baseline recorded on the same machine.
+"""
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import types
+
+import torch
+import torch.nn.functional as F
+from torch._subclasses import FakeTensorMode
+from torch.fx.experimental.proxy_tensor import make_fx
+
+# import dicp from the checkout this script lives in when it is not installed
+if importlib.util.find_spec("dicp") is None:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "compile_cpu.json")
+BACKENDS = ["ascendgraph", "topsgraph"]
+
+
+def install_device_stubs():
+    # the pipeline up to codegen only imports the device runtimes,
+    # empty modules are enough to run it on a plain linux box
+    for name in ["acl", "torch_dipu"]:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            sys.modules[name] = types.ModuleType(name)
+    # generated modules look up the device name at import
+    torch_dipu = sys.modules["torch_dipu"]
+    if not hasattr(torch_dipu, "dipu"):
+        torch_dipu.dipu = types.SimpleNamespace(device=types.SimpleNamespace(__diputype__="cpu"))
+
+
+def stub_compile_jobs():
+    # build and load of the device kernels are replaced by a no-op kernel
+    from dicp.dynamo_bridge.compile import AsyncCompileKernel
+
+    def compile_kernel(self, device_compile_job):
+        device_compile_job.get_key()
+        return lambda *args, **kwargs: None
+    AsyncCompileKernel.compile_kernel = compile_kernel
+
+
+def empty(*shape, dtype=torch.float32):
+    # called under the fake mode, weights of large graphs never get allocated
+    return torch.empty(shape, dtype=dtype)
+
+
+def mlp(layers, hidden=1024):
+    def fn(x, *weights):
+        for i in range(layers):
+            x = F.relu(torch.matmul(x, weights[2 * i]) + weights[2 * i + 1])
+        return (x,)
+    weights = []
+    for _ in range(layers):
+        weights += [empty(hidden, hidden, dtype=torch.float16), empty(hidden, dtype=torch.float16)]
+    return fn, [empty(32, hidden, dtype=torch.float16)] + weights
+
+
+def attention(layers, heads=16, seq=128, head_dim=64):
+    hidden = heads * head_dim
+
+    def fn(x, *weights):
+        for i in range(layers):
+            wq, wk, wv, wo = weights[4 * i: 4 * i + 4]
+            q = torch.matmul(x, wq).view(1, seq, heads, head_dim).transpose(1, 2)
+            k = torch.matmul(x, wk).view(1, seq, heads, head_dim).transpose(1, 2)
+            v = torch.matmul(x, wv).view(1, seq, heads, head_dim).transpose(1, 2)
+            score = torch.matmul(q, k.transpose(2, 3)) / (head_dim ** 0.5)
+            out = torch.matmul(torch.softmax(score, dim=-1), v)
+            x = x + torch.matmul(out.transpose(1, 2).reshape(1, seq, hidden), wo)
+        return (x,)
+    weights = [empty(hidden, hidden, dtype=torch.float16) for _ in range(4 * layers)]
+    return fn, [empty(1, seq, hidden, dtype=torch.float16)] + weights
+
+
+def conv(layers, channels=64, size=56):
+    def fn(x, *weights):
+        for i in range(layers):
+            x = F.relu(F.conv2d(x, weights[2 * i], weights[2 * i + 1], padding=1)) + x
+        return (x,)
+    weights = []
+    for _ in range(layers):
+        weights += [empty(channels, channels, 3, 3), empty(channels)]
+    return fn, [empty(1, channels, size, size)] + weights
+
+
+def llama(layers, heads=32, seq=64, head_dim=128, ffn=11008):
+    hidden = heads * head_dim
+
+    def rms_norm(x, w):
+        variance = x.to(torch.float32).pow(2).mean(-1, keepdim=True)
+        return (x * torch.rsqrt(variance + 1e-6)).to(x.dtype) * w
+
+    def rotate(x, cos, sin):
+        x1, x2 = x[..., :head_dim // 2], x[..., head_dim // 2:]
+        return x * cos + torch.cat((-x2, x1), dim=-1) * sin
+
+    def fn(x, cos, sin, *weights):
+        for i in range(layers):
+            norm1, wq, wk, wv, wo, norm2, w1, w2, w3 = weights[9 * i: 9 * i + 9]
+            h = rms_norm(x, norm1)
+            q = rotate(torch.matmul(h, wq).view(1, seq, heads, head_dim).transpose(1, 2), cos, sin)
+            k = rotate(torch.matmul(h, wk).view(1, seq, heads, head_dim).transpose(1, 2), cos, sin)
+            v = torch.matmul(h, wv).view(1, seq, heads, head_dim).transpose(1, 2)
+            score = torch.matmul(q, k.transpose(2, 3)) / (head_dim ** 0.5)
+            out = torch.matmul(torch.softmax(score.float(), dim=-1).to(q.dtype), v)
+            x = x + torch.matmul(out.transpose(1, 2).reshape(1, seq, hidden), wo)
+            h = rms_norm(x, norm2)
+            x = x + torch.matmul(F.silu(torch.matmul(h, w1)) * torch.matmul(h, w3), w2)
+        return (x,)
+    weights = []
+    for _ in range(layers):
+        weights += [empty(hidden, dtype=torch.float16)]
+        weights += [empty(hidden, hidden, dtype=torch.float16) for _ in range(4)]
+        weights += [empty(hidden, dtype=torch.float16)]
+        weights += [empty(hidden, ffn, dtype=torch.float16), empty(ffn, hidden, dtype=torch.float16),
+                    empty(hidden, ffn, dtype=torch.float16)]
+    inputs = [empty(1, seq, hidden, dtype=torch.float16),
+              empty(1, 1, seq, head_dim, dtype=torch.float16),
+              empty(1, 1, seq, head_dim, dtype=torch.float16)]
+    return fn, inputs + weights
+
+
+MODELS = {"mlp": mlp, "attention": attention, "conv": conv, "llama": llama}
+
+
+def trace(model, layers, backend):
+    from dicp.dynamo_bridge.compile_fx import get_decompositions
+    # trace like aot_autograd does, under a fake mode so every node carries a fake 'val'
+    with FakeTensorMode():
+        fn, inputs = MODELS[model](layers)
+        gm = make_fx(fn, decomposition_table=get_decompositions(backend))(*inputs)
+    return gm, inputs
+
+
+def build_graph(model, nodes, backend):
+    # grow the layer count until the aten graph reaches the requested size
+    gm, inputs = trace(model, 1, backend)
+    per_layer = max(1, len(gm.graph.nodes) - 2)
+    layers = max(1, round(nodes / per_layer))
+    if layers > 1:
+        gm, inputs = trace(model, layers, backend)
+    return gm, inputs
+
+
+def compile_once(backend, model, nodes):
+    from torch._inductor.codecache import PyCodeCache
+    from dicp.dynamo_bridge.compile_fx import compile_fx_inner
+    from dicp.dynamo_bridge.compile_profiler import compile_profiler
+    from dicp.dynamo_bridge.operator import InferResultCache
+
+    gm, inputs = build_graph(model, nodes, backend)
+    graph_nodes = len(gm.graph.nodes)
+    # every run is a cold compile
+    PyCodeCache.cache.clear()
+    InferResultCache.clear()
+    compile_profiler.clear()
+    start = time.perf_counter()
+    compile_fx_inner(gm, inputs, graph_id=f"{model}{nodes}", backend=backend)
+    total = time.perf_counter() - start
+    graph = next(iter(compile_profiler.summary()["graphs"].values()))
+    return {
+        "nodes": graph_nodes,
+        "transformed_nodes": graph.get("transformed_nodes"),
+        "total": total,
+        "stages": graph["stages"],
+    }
+
+
+def bench_case(backend, model, nodes, repeat):
+    runs = [compile_once(backend, model, nodes) for _ in range(repeat)]
+    return min(runs, key=lambda res: res["total"])
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for case, res in results.items():
+        base = baseline.get("results", {}).get(case)
+        if base is None:
+            continue
+        ratio = res["total"] / max(base["total"], 1e-9)
+        if ratio > 1 + threshold:
+            regressions.append((case, base["total"], res["total"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cpu-only compile time of the dicp pipeline")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 5000, 20000],
+                        help="approximate number of aten nodes per graph")
+    parser.add_argument("--repeat", type=int, default=1, help="report the fastest of several runs")
+    parser.add_argument("--output", default=None, help="write results as json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown over the baseline reported as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    install_device_stubs()
+    stub_compile_jobs()
+    from dicp.dynamo_bridge.compile_profiler import compile_profiler
+    compile_profiler.enable()
+
+    # first compile pays for imports and lazy initialization
+    for backend in args.backends:
+        compile_once(backend, "mlp", 10)
+
+    results = {}
+    print(f"{'case':<32}{'nodes':>8}{'total(s)':>10}  slowest stage")
+    for backend in args.backends:
+        for model in args.models:
+            for size in args.sizes:
+                case = f"{backend}/{model}/{size}"
+                res = results[case] = bench_case(backend, model, size, args.repeat)
+                slowest = max(res["stages"].items(), key=lambda kv: kv[1])
+                print(f"{case:<32}{res['nodes']:>8}{res['total']:>10.3f}  {slowest[0]} ({slowest[1]:.3f}s)")
+
+    output = {"torch": torch.__version__, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(output, f, indent=2)
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for case, base, cur, ratio in regressions:
+            print(f"regression {case}: {base:.3f}s -> {cur:.3f}s ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
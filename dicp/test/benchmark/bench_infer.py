@@ -0,0 +1,53 @@
+import argparse
+import time
+import torch
+from torch._subclasses import FakeTensorMode
+from bench_compile import install_device_stubs
+
+# ascend_op imports the acl runtime, empty stubs are enough on a host without Ascend
+install_device_stubs()
+import dicp.dynamo_bridge.operator as operator  # noqa: E402
+import dicp.vendor.AscendGraph.ascend_op as ascend_op  # noqa: E402
+
+
+def gen_cases(fake_mode):
+    with fake_mode:
+        x = torch.empty([8, 128, 4096], dtype=torch.float16)
+        y = torch.empty([4096], dtype=torch.float16)
+    return [
+        ("Add", ascend_op.Add, (x, y), {}),
+        ("Mul", ascend_op.Mul, (x, y), {}),
+        ("Less", ascend_op.Less, (x, y), {}),
+        ("Sigmoid", ascend_op.Sigmoid, (x,), {}),
+        ("Cast", ascend_op.Cast, (x, "FLOAT"), {}),
+        ("ReduceSumD", ascend_op.ReduceSumD, (x, [-1], True), {}),
+    ]
+
+
+def bench(op, args, kwargs, iters):
+    op(*args, **kwargs)
+    start = time.perf_counter()
+    for _ in range(iters):
+        op(*args, **kwargs)
+    return (time.perf_counter() - start) / iters * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-node operator inference cost")
+    parser.add_argument("--iters", type=int, default=1000)
+    args = parser.parse_args()
+
+    # measure inference itself, not the memoization
+    operator.infer_cache_enabled = False
+    print(f"{'op':<12}{'fake tensor(us)':>18}{'metadata(us)':>18}{'speedup':>10}")
+    for name, op_cls, op_args, op_kwargs in gen_cases(FakeTensorMode()):
+        op = op_cls.get_singleton()
+        operator.meta_infer_enabled = False
+        fake_cost = bench(op, op_args, op_kwargs, args.iters)
+        operator.meta_infer_enabled = True
+        rule_cost = bench(op, op_args, op_kwargs, args.iters)
+        print(f"{name:<12}{fake_cost:>18.1f}{rule_cost:>18.1f}{fake_cost / rule_cost:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
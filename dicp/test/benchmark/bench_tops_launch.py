@@ -0,0 +1,114 @@
+"""
+Python overhead of launching a topsgraph kernel.
+
+A stub graph library with the same entry points as a generated one, but an
+empty run(), is compiled with the host compiler, so the time per call is
+the marshalling of tensor pointers done around the launch:
+
+    python bench_tops_launch.py --inputs 4 32 --iters 100000
+"""
+import argparse
+import ctypes
+import importlib.util
+import os
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+from ctypes import c_void_p
+
+import torch
+
+# import dicp from the checkout this script lives in when it is not installed
+if importlib.util.find_spec("dicp") is None:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from dicp.dynamo_bridge.compile import DeviceKernelCache  # noqa: E402
+from dicp.vendor.TopsGraph.codegen.launcher import TopsLauncher  # noqa: E402
+
+include_path = os.path.join(os.path.dirname(__file__), "../../dicp/vendor/TopsGraph/codegen/include")
+
+STUB_SOURCE = """
+#include "py_launch.h"
+
+extern "C" void run(void *dipu_stream, int device_id, void **inputs_ptr, void **outputs_ptr) {}
+
+extern "C" PyObject* run_tensors(void *dipu_stream, int device_id, PyObject *inputs, PyObject *outputs) {
+  void *inputs_ptr[NUM_INPUTS];
+  void *outputs_ptr[NUM_OUTPUTS];
+  if (tensor_data_ptrs(inputs, inputs_ptr, NUM_INPUTS) < 0 ||
+      tensor_data_ptrs(outputs, outputs_ptr, NUM_OUTPUTS) < 0) {
+    return NULL;
+  }
+  run(dipu_stream, device_id, inputs_ptr, outputs_ptr);
+  Py_RETURN_NONE;
+}
+"""
+
+
+class StubJob:
+    def __init__(self, key):
+        self.key = key
+
+    def get_key(self):
+        return self.key
+
+
+def build_stub(tmpdir, num_inputs, num_outputs):
+    source = os.path.join(tmpdir, f"stub_{num_inputs}.cpp")
+    lib = os.path.join(tmpdir, f"stub_{num_inputs}.so")
+    with open(source, "w") as f:
+        f.write(STUB_SOURCE)
+    subprocess.check_call(["c++", "-O2", "-fPIC", "-shared",
+                           f"-DNUM_INPUTS={num_inputs}", f"-DNUM_OUTPUTS={num_outputs}",
+                           f"-I{include_path}", f"-I{sysconfig.get_paths()['include']}",
+                           source, "-o", lib])
+    return ctypes.cdll.LoadLibrary(lib)
+
+
+def legacy_call(kernel, inputs, outputs):
+    # what call() did before TopsLauncher
+    arg_ptrs = [c_void_p(t.data_ptr()) for t in inputs]
+    buf_ptrs = [c_void_p(t.data_ptr()) for t in outputs]
+    args_ptr_type = c_void_p * len(arg_ptrs)
+    bufs_ptr_type = c_void_p * len(buf_ptrs)
+    args_ptr = args_ptr_type(*arg_ptrs)
+    bufs_ptr = bufs_ptr_type(*buf_ptrs)
+    kernel(c_void_p(None), 0, args_ptr, bufs_ptr)
+
+
+def bench(fn, iters):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) / iters * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="python overhead of a topsgraph kernel launch")
+    parser.add_argument("--inputs", type=int, nargs="+", default=[4, 32, 128])
+    parser.add_argument("--outputs", type=int, default=2)
+    parser.add_argument("--iters", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'inputs':<8}{'legacy us':>12}{'ctypes us':>12}{'ext us':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for num_inputs in args.inputs:
+            lib = build_stub(tmpdir, num_inputs, args.outputs)
+            key = f"stub_{num_inputs}"
+            DeviceKernelCache.cache[key] = lib
+            inputs = tuple(torch.empty(4) for _ in range(num_inputs))
+            outputs = tuple(torch.empty(4) for _ in range(args.outputs))
+
+            launcher = TopsLauncher(StubJob(key), lib.run, num_inputs, args.outputs)
+            ext_launcher = TopsLauncher(StubJob(key), lib.run, num_inputs, args.outputs, ext=True)
+            legacy = bench(lambda: legacy_call(lib.run, inputs, outputs), args.iters)
+            fast = bench(lambda: launcher(None, 0, inputs, outputs), args.iters)
+            ext = bench(lambda: ext_launcher(None, 0, inputs, outputs), args.iters)
+            print(f"{num_inputs:<8}{legacy:>12.2f}{fast:>12.2f}{ext:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+from dicp.dynamo_bridge.compile import ArtifactCache
+
+
+def write_artifact(size):
+    def build(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * size)
+    return build
+
+
+class TestArtifactCache():
+    def test_hit_and_miss(self, tmp_path):
+        cache = ArtifactCache(root=str(tmp_path / "cache"))
+        path = str(tmp_path / "a.om")
+        assert cache.fetch("a", path, write_artifact(8)) == path
+        assert cache.fetch("a", path, write_artifact(8)) == path
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 8)
+
+    def test_shared_index_across_instances(self, tmp_path):
+        root = str(tmp_path / "cache")
+        path = str(tmp_path / "a.om")
+        ArtifactCache(root=root).fetch("a", path, write_artifact(8))
+
+        def fail(tmp_path):
+            raise AssertionError("artifact should not be rebuilt")
+        other = ArtifactCache(root=root)
+        assert other.fetch("a", path, fail) == path
+        assert other.stats()["hits"] == 1
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ArtifactCache(root=str(tmp_path / "cache"), max_bytes=20)
+        paths = [str(tmp_path / f"{k}.om") for k in "abc"]
+        cache.fetch("a", paths[0], write_artifact(8))
+        cache.fetch("b", paths[1], write_artifact(8))
+        cache.fetch("a", paths[0], write_artifact(8))
+        cache.fetch("c", paths[2], write_artifact(8))
+        assert cache.stats()["evictions"] == 1
+        assert os.path.exists(paths[0]) and not os.path.exists(paths[1])
+
+    def test_failed_build_publishes_nothing(self, tmp_path):
+        cache = ArtifactCache(root=str(tmp_path / "cache"))
+        path = str(tmp_path / "a.om")
+
+        def broken(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(b"half")
+            raise RuntimeError("build failed")
+        try:
+            cache.fetch("a", path, broken)
+        except RuntimeError:
+            pass
+        assert os.listdir(tmp_path) == ["cache"]
+        assert cache.stats()["entries"] == 0
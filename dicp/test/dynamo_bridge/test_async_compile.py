@@ -0,0 +1,88 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+import dicp.dynamo_bridge.compile as compile
+from dicp.dynamo_bridge.compile import (
+    AsyncCompileKernel,
+    DeviceCompileJob,
+    DeviceKernelCache,
+    DeviceKernelFuture
+)
+
+
+class FakeKernel():
+    def __init__(self, key):
+        self.key = key
+
+    def run(self, x):
+        return (self.key, x)
+
+
+class FakeCompileJob(DeviceCompileJob):
+    def __init__(self, key, release):
+        super().__init__()
+        self._key = key
+        self._release = release
+        self.build_thread = None
+        self.load_thread = None
+
+    def get_key(self):
+        return self._key
+
+    def build(self):
+        self._release.wait()
+        self.build_thread = threading.current_thread()
+
+    def get_compile_result(self):
+        self.load_thread = threading.current_thread()
+        return FakeKernel(self._key)
+
+
+class TestAsyncCompileKernel():
+    def test_lazy_parallel_build(self, monkeypatch):
+        monkeypatch.setattr(compile, "compile_threads", 4)
+        DeviceKernelCache.clear()
+        release = threading.Event()
+        jobs = [FakeCompileJob(f"graph{i}", release) for i in range(3)]
+        async_compile = AsyncCompileKernel()
+        kernels = [async_compile.compile_kernel(job) for job in jobs]
+
+        # submitting does not wait for the builds
+        assert all(isinstance(k, DeviceKernelFuture) for k in kernels)
+        assert all(job.load_thread is None for job in jobs)
+        release.set()
+
+        assert kernels[1](7) == ("graph1", 7)
+        assert jobs[1].build_thread is not threading.current_thread()
+        assert jobs[1].load_thread is threading.current_thread()
+        assert jobs[0].load_thread is None
+        DeviceKernelCache.clear()
+
+    def test_sync_build(self, monkeypatch):
+        monkeypatch.setattr(compile, "compile_threads", 1)
+        DeviceKernelCache.clear()
+        release = threading.Event()
+        release.set()
+        job = FakeCompileJob("graph", release)
+        kernel = AsyncCompileKernel().compile_kernel(job)
+        assert kernel(1) == ("graph", 1)
+        assert job.load_thread is threading.current_thread()
+        DeviceKernelCache.clear()
+
+    def test_timeout_counts_from_submission(self, monkeypatch):
+        monkeypatch.setattr(compile, "compile_threads", 4)
+        monkeypatch.setattr(compile, "compile_timeout", 0.2)
+        DeviceKernelCache.clear()
+        release = threading.Event()
+        job = FakeCompileJob("slow_graph", release)
+        kernel = AsyncCompileKernel().compile_kernel(job)
+        time.sleep(0.3)
+        # the budget was spent while the caller did other work
+        start = time.monotonic()
+        with pytest.raises(concurrent.futures.TimeoutError):
+            kernel.result()
+        assert time.monotonic() - start < 0.1
+        release.set()
+        DeviceKernelCache.clear()
@@ -0,0 +1,47 @@
+import torch
+import torch.fx
+
+from dicp.dynamo_bridge.utils import canonical_node_name, get_graph_key
+from dicp.vendor.TopsGraph.codegen.enflame import EnflameCodegen
+
+
+class TestCanonicalNodeName():
+    def test_ignores_fx_counters(self):
+        a = [canonical_node_name(n, i) for i, n in enumerate(["arg0_1", "add_3", "mul_tensor_7"])]
+        b = [canonical_node_name(n, i) for i, n in enumerate(["arg0_1", "add_11", "mul_tensor"])]
+        assert a == b == ["arg0_0", "add_1", "mul_tensor_2"]
+
+    def test_names_stay_unique(self):
+        names = ["add", "add_1", "add_1_2", "add_12"]
+        canonical = [canonical_node_name(n, i) for i, n in enumerate(names)]
+        assert len(set(canonical)) == len(names)
+
+
+def abs_add_graph(suffix):
+    # the same graph as built by tracers whose name counters are at another position
+    graph = torch.fx.Graph()
+    x = graph.placeholder(f"arg0_{suffix}")
+    x.meta['val'] = torch.empty(2, 3)
+    nodes = []
+    for name, args in [("Abs", (x,)), ("Relu", None), ("Add", None)]:
+        args = args or ((nodes[-1],) if name == "Relu" else (nodes[0], nodes[-1]))
+        node = graph.create_node('call_function', torch.abs, args, name=f"{name}_{suffix}")
+        node.meta['val'] = torch.empty(2, 3)
+        nodes.append(node)
+    graph.output((nodes[-1],))
+    return torch.fx.GraphModule(torch.nn.Module(), graph)
+
+
+class TestStructuralIdentity():
+    def test_same_graph_key_and_code(self):
+        a, b = abs_add_graph(3), abs_add_graph(17)
+        assert a.code != b.code
+        assert get_graph_key(a) == get_graph_key(b)
+        assert EnflameCodegen(a).codegen() == EnflameCodegen(b).codegen()
+
+    def test_graph_key_follows_structure(self):
+        a = abs_add_graph(3)
+        b = abs_add_graph(3)
+        add = [n for n in b.graph.nodes if n.name.startswith("Add")][0]
+        add.args = (add.args[1], add.args[0])
+        assert get_graph_key(a) != get_graph_key(b)
@@ -0,0 +1,43 @@
+import json
+import time
+from dicp.dynamo_bridge.compile_profiler import CompileProfiler
+
+
+class TestCompileProfiler():
+    def test_disabled_records_nothing(self):
+        profiler = CompileProfiler(output_dir="")
+        assert not profiler.enabled
+        with profiler.graph("g0"), profiler.stage("codegen"):
+            profiler.record(nodes=3)
+        assert profiler.events == [] and profiler.counters == {}
+
+    def test_nested_stages_use_self_time(self, tmp_path):
+        profiler = CompileProfiler(output_dir=str(tmp_path))
+        with profiler.graph("g0"):
+            with profiler.stage("compile_fx_inner"):
+                with profiler.stage("codegen"):
+                    time.sleep(0.02)
+            profiler.record(nodes=10)
+        with profiler.stage("ge_build", graph="g0"):
+            pass
+        summary = profiler.summary()
+        g0 = summary["graphs"]["g0"]
+        assert set(g0["stages"]) == {"compile_fx_inner", "codegen", "ge_build"}
+        assert g0["stages"]["codegen"] >= 0.02
+        assert g0["stages"]["compile_fx_inner"] < g0["stages"]["codegen"]
+        assert g0["nodes"] == 10
+        assert abs(g0["total"] - sum(g0["stages"].values())) < 1e-9
+        profiler.disable()
+
+    def test_dump(self, tmp_path):
+        profiler = CompileProfiler(output_dir=str(tmp_path))
+        with profiler.graph("g1"), profiler.stage("infer_shape_dtype"):
+            profiler.record(artifact_bytes=64)
+        profiler.dump()
+        with open(tmp_path / "compile_summary.json") as f:
+            assert "g1" in json.load(f)["graphs"]
+        with open(tmp_path / "compile_trace.json") as f:
+            event, = json.load(f)["traceEvents"]
+        assert event["ph"] == "X" and event["args"] == {"graph": "g1", "artifact_bytes": 64}
+        assert "infer_shape_dtype" in profiler.table()
+        profiler.disable()
@@ -0,0 +1,87 @@
+import torch
+from torch._subclasses import FakeTensor, FakeTensorMode
+from dicp.dynamo_bridge.operator import Operator, InferResultCache, get_default_fake_mode, graph_fake_mode_scope
+from dicp.dynamo_bridge.utils import TensorInfo
+
+
+class CountedAdd(Operator):
+    calls = 0
+
+    def __init__(self):
+        super().__init__("CountedAdd")
+
+    def infer_result(self, x, y, alpha=1):
+        CountedAdd.calls += 1
+        return torch.empty(x.shape, dtype=x.dtype)
+
+
+def fake_empty(shape, dtype=torch.float32):
+    with FakeTensorMode():
+        return torch.empty(shape, dtype=dtype)
+
+
+class TestInferResultCache():
+    def setup_method(self):
+        InferResultCache.clear()
+        CountedAdd.calls = 0
+
+    def test_reuse_across_fake_modes(self):
+        op = CountedAdd.get_singleton()
+        a = op(fake_empty([2, 3]), fake_empty([2, 3]))
+        x = fake_empty([2, 3])
+        b = op(x, fake_empty([2, 3]))
+        assert CountedAdd.calls == 1
+        # a hit is rebuilt in the fake mode of its arguments
+        assert b is not a and b.fake_mode is x.fake_mode
+        assert (b.shape, b.dtype, b.stride()) == (a.shape, a.dtype, a.stride())
+
+    def test_lru_eviction(self, monkeypatch):
+        monkeypatch.setattr(InferResultCache, "max_size", 2)
+        op = CountedAdd.get_singleton()
+        for shape in ([1], [2], [1], [3], [1], [2]):
+            op(fake_empty(shape), fake_empty(shape))
+        # [1] stays in use and is kept, [2] was evicted by [3]
+        assert CountedAdd.calls == 4
+        assert len(InferResultCache.cache) == 2
+
+    def test_key_distinguishes_args(self):
+        op = CountedAdd.get_singleton()
+        op(fake_empty([2, 3]), fake_empty([2, 3]))
+        op(fake_empty([2, 3], torch.float16), fake_empty([2, 3]))
+        op(fake_empty([2, 3]), fake_empty([2, 3]), alpha=2)
+        op(fake_empty([2, 3]), fake_empty([2, 3]), alpha=2.0)
+        assert CountedAdd.calls == 4
+
+    def test_uncacheable_arg(self):
+        op = CountedAdd.get_singleton()
+        op(fake_empty([2, 3]), object())
+        op(fake_empty([2, 3]), object())
+        assert CountedAdd.calls == 2
+
+
+class MetaLess(Operator):
+    calls = 0
+
+    def __init__(self):
+        super().__init__("MetaLess")
+
+    def infer_result(self, x, y) -> TensorInfo:
+        MetaLess.calls += 1
+        return TensorInfo(list(x.shape), torch.bool, torch.contiguous_format)
+
+
+class TestMetadataInfer():
+    def test_tensor_info_result(self):
+        InferResultCache.clear()
+        x = fake_empty([4, 5])
+        out = MetaLess.get_singleton()(x, x)
+        assert MetaLess.calls == 1
+        assert isinstance(out, FakeTensor) and out.fake_mode is x.fake_mode
+        assert (list(out.shape), out.dtype, out.stride()) == ([4, 5], torch.bool, (5, 1))
+
+    def test_default_fake_mode_per_graph(self):
+        with graph_fake_mode_scope():
+            first = get_default_fake_mode()
+            assert get_default_fake_mode() is first
+        with graph_fake_mode_scope():
+            assert get_default_fake_mode() is not first
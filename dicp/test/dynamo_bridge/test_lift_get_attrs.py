@@ -0,0 +1,70 @@
+import types
+
+import torch
+from torch._subclasses import FakeTensor
+from torch.fx.experimental.proxy_tensor import make_fx
+from dicp.dynamo_bridge.graph import GraphTransformer, LiftedWeights
+from dicp.dynamo_bridge.utils import fetch_attr, lift_get_attrs
+
+
+def scale(x):
+    # constants created while tracing end up as get_attr nodes
+    return (x * torch.tensor([[0., 1., 2.], [3., 4., 5.]]) + torch.tensor([1., 1., 1.]),)
+
+
+class TestLiftGetAttrs():
+    def test_attrs_become_inputs(self):
+        x = torch.randn(2, 3)
+        gm = make_fx(scale, tracing_mode="fake")(x)
+        assert [n.op for n in gm.graph.nodes].count('get_attr') == 2
+        lifted, targets = lift_get_attrs(gm)
+        weights = [fetch_attr(gm, target) for target in targets]
+
+        # the caller's graph is left untouched
+        assert [n.op for n in gm.graph.nodes].count('get_attr') == 2
+        assert [n.op for n in lifted.graph.nodes].count('get_attr') == 0
+        placeholders = [n for n in lifted.graph.nodes if n.op == 'placeholder']
+        assert len(placeholders) == 3 and len(weights) == 2
+        assert all(isinstance(n.meta['val'], FakeTensor) for n in placeholders)
+        fake_modes = {n.meta['val'].fake_mode for n in placeholders}
+        assert len(fake_modes) == 1
+
+        assert torch.equal(lifted(x, *weights)[0], scale(x)[0])
+        # another weight set runs on the same graph
+        assert torch.equal(lifted(x, weights[0] * 2, weights[1])[0], x * weights[0] * 2 + weights[1])
+
+    def compile_with_weights(self, module, device):
+        calls = []
+        gt = GraphTransformer.__new__(GraphTransformer)
+        gt.compile_to_module = lambda: types.SimpleNamespace(call=lambda args: calls.append(list(args)))
+        gt.lifted_weights = LiftedWeights(module, ["w"], lambda: calls.append(device) or torch.device(device))
+        return gt.compile_to_fn(), calls
+
+    def test_weights_move_to_backend_device(self):
+        module = torch.nn.Module()
+        module.w = torch.randn(2, 3)
+        fn, calls = self.compile_with_weights(module, "meta")
+        # a cpu input does not decide where the weights go
+        fn([torch.randn(2, 3)])
+        fn([torch.randn(2, 3)])
+        # the device is resolved once
+        assert calls[0] == "meta"
+        calls.pop(0)
+        first, second = calls[0][-1], calls[1][-1]
+        assert first.device == torch.device("meta") and second is first
+
+        # an updated weight is moved again
+        module.w.add_(1)
+        fn([torch.randn(2, 3)])
+        assert calls[2][-1] is not first
+
+    def test_weights_read_at_call_time(self):
+        module = torch.nn.Module()
+        module.w = torch.zeros(2, 3)
+        fn, calls = self.compile_with_weights(module, "cpu")
+        fn([torch.randn(2, 3)])
+        calls.pop(0)
+        assert calls[0][-1] is module.w
+        module.w = torch.full((2, 3), 2.)
+        fn([torch.randn(2, 3)])
+        assert calls[1][-1] is module.w
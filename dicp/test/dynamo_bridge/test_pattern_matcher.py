@@ -0,0 +1,73 @@
+import torch
+from torch._dynamo.utils import counters
+from torch.fx.experimental.proxy_tensor import make_fx
+from dicp.dynamo_bridge.op_transformer import (
+    BackendPatternBase,
+    BackendPatternMatcherTransformer,
+    PatternMatcherPass,
+    pattern_stats,
+)
+
+aten = torch.ops.aten
+
+# inductor refuses to register a pattern twice, share one pass
+test_patterns = PatternMatcherPass()
+
+
+class FoldDoubleNeg(BackendPatternBase):
+    @staticmethod
+    def pattern(x):
+        return aten.neg.default(aten.neg.default(x))
+
+    @staticmethod
+    def replacement(x):
+        return aten.relu.default(x)
+
+
+class FoldDoubleRelu(BackendPatternBase):
+    @staticmethod
+    def pattern(x):
+        return aten.relu.default(aten.relu.default(x))
+
+    @staticmethod
+    def replacement(x):
+        return aten.relu.default(x)
+
+
+def trace(fn):
+    return make_fx(fn)(torch.randn(4))
+
+
+def count_targets(gm, target):
+    return sum(n.target == target for n in gm.graph.nodes)
+
+
+class TestBackendPatternMatcher():
+    def test_fixed_point(self):
+        # folding the negations exposes relu(relu(x)), matched by a later sweep
+        gm = trace(lambda x: aten.neg(aten.neg(aten.neg(aten.neg(x)))))
+        matcher = BackendPatternMatcherTransformer(test_patterns, [FoldDoubleNeg, FoldDoubleRelu])
+        gm = matcher.transform(gm)
+        assert count_targets(gm, aten.neg.default) == 0
+        assert count_targets(gm, aten.relu.default) == 1
+        x = torch.randn(4)
+        torch.testing.assert_close(gm(x), torch.relu(x))
+        assert pattern_stats["FoldDoubleNeg"][0] >= 2
+        assert pattern_stats["FoldDoubleRelu"][0] >= 1
+
+    def test_skip_recompile(self):
+        gm = trace(lambda x: aten.neg(aten.neg(x)))
+        code = gm.code
+        matcher = BackendPatternMatcherTransformer(test_patterns, [FoldDoubleNeg])
+        gm = matcher.transform(gm, recompile=False)
+        assert count_targets(gm, aten.relu.default) == 1
+        assert gm.code == code
+        gm.recompile()
+        assert "relu" in gm.code
+
+    def test_inductor_counters(self):
+        # matching is delegated to PatternMatcherPass, its counters keep working
+        before = counters["inductor"]["pattern_matcher_count"]
+        gm = trace(lambda x: aten.neg(aten.neg(x)))
+        BackendPatternMatcherTransformer(test_patterns, [FoldDoubleNeg]).transform(gm)
+        assert counters["inductor"]["pattern_matcher_count"] == before + 1
@@ -0,0 +1,100 @@
+import torch
+from torch._functorch.aot_autograd import make_boxed_func
+from torch.fx.experimental.proxy_tensor import make_fx
+from dicp.dynamo_bridge.shape_bucket import BucketedGraph, bucketed_symbols, has_dynamic_inputs
+
+
+def fn(x, w):
+    return (torch.matmul(x, w) + 1, x.sum(-1))
+
+
+class FakeCompiler:
+    def __init__(self):
+        self.graphs = []
+
+    def __call__(self, gm, example_inputs):
+        self.graphs.append(gm)
+        return make_boxed_func(gm.forward)
+
+
+def static_shapes(gm):
+    return [tuple(n.meta['val'].shape) for n in gm.graph.nodes if n.op == 'placeholder']
+
+
+class TestBucketedGraph():
+    def setup_method(self):
+        self.gm = make_fx(fn, tracing_mode="symbolic")(torch.randn(5, 8), torch.randn(8, 4))
+        self.compiler = FakeCompiler()
+        # symbolic tracing makes every dim dynamic, single buckets keep the weight unpadded,
+        # the reduced dim is declared safe to pad since it never grows
+        buckets = bucketed_symbols(self.gm, {"input0.0": [4, 8, 16], "input0.1": [8], "input1.1": [4]},
+                                   pad_safe={"input0.1"})
+        self.bucketed = BucketedGraph(self.gm, self.compiler, buckets)
+
+    def check(self, rows):
+        x, w = torch.randn(rows, 8), torch.randn(8, 4)
+        out = self.bucketed([x, w])
+        for res, ref in zip(out, fn(x, w)):
+            torch.testing.assert_close(res, ref)
+
+    def test_has_dynamic_inputs(self):
+        assert has_dynamic_inputs(self.gm)
+        assert not has_dynamic_inputs(make_fx(fn)(torch.randn(5, 8), torch.randn(8, 4)))
+
+    def test_one_static_graph_per_bucket(self):
+        for rows in [5, 7, 8, 6]:
+            self.check(rows)
+        assert len(self.compiler.graphs) == 1
+        assert static_shapes(self.compiler.graphs[0]) == [(8, 8), (8, 4)]
+        self.check(12)
+        assert len(self.compiler.graphs) == 2
+        assert static_shapes(self.compiler.graphs[1]) == [(16, 8), (8, 4)]
+
+    def test_dynamic_fallback_above_buckets(self):
+        self.check(40)
+        self.check(33)
+        assert len(self.compiler.graphs) == 1
+        assert has_dynamic_inputs(self.compiler.graphs[0])
+
+
+class TestBucketedSymbols():
+    def trace(self, f, *shapes):
+        return make_fx(f, tracing_mode="symbolic")(*[torch.randn(shape) for shape in shapes])
+
+    def test_undeclared_symbol_stays_dynamic(self):
+        gm = self.trace(lambda x: (x * 2,), [3, 5])
+        assert bucketed_symbols(gm, {"input0.1": [8, 16]}) is None
+        buckets = bucketed_symbols(gm, {"input0.1": [8, 16], "s0": [4]})
+        assert sorted(buckets.values()) == [[4], [8, 16]]
+
+    def test_input_mutation_stays_dynamic(self):
+        def cache_update(cache, x):
+            cache.add_(x)
+            return (cache * 2,)
+        gm = self.trace(cache_update, [3, 5], [3, 5])
+        assert bucketed_symbols(gm, {"s0": [4], "s1": [8]}) is None
+
+    def test_reduction_over_padded_dim(self):
+        for f in (lambda x: (x.sum(-1),), lambda x: (x.softmax(-1),), lambda x: (x @ x.t(),)):
+            gm = self.trace(f, [3, 5])
+            assert bucketed_symbols(gm, {"s0": [4], "s1": [8]}) is None
+            assert bucketed_symbols(gm, {"s0": [4], "s1": [8]}, pad_safe={"s1"}) is not None
+
+    def test_cat_along_padded_dim(self):
+        # padding x to 8 rows puts zeros between x and x + 1
+        gm = self.trace(lambda x: (torch.cat([x, x + 1], 0),), [3, 5])
+        assert bucketed_symbols(gm, {"s0": [4], "s1": [8]}) is None
+        gm = self.trace(lambda x, y: (torch.cat([x, y], 1),), [3, 5], [3, 2])
+        assert bucketed_symbols(gm, {"s0": [4], "s1": [8], "s2": [4]}) is None
+        gm = self.trace(lambda x: (torch.cat([x, x + 1], 1),), [3, 5])
+        assert bucketed_symbols(gm, {"s0": [4], "s1": [8]}, pad_safe={"s1"}) is not None
+
+    def test_view_merging_padded_dim(self):
+        for f in (lambda x: (x.reshape(-1),), lambda x: (x.flatten(),), lambda x: (x.view(-1, 1),)):
+            gm = self.trace(f, [3, 5])
+            assert bucketed_symbols(gm, {"s0": [4], "s1": [8]}) is None
+        # padded dims coming out whole keep their padding in place
+        for f in (lambda x: (x.unsqueeze(0).flatten(0, 1) * 2,), lambda x: (x.reshape(1, *x.shape, 1) * 2,)):
+            gm = self.trace(f, [3, 5])
+            assert bucketed_symbols(gm, {"s0": [4], "s1": [8]}) is not None
+
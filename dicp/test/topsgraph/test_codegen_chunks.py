@@ -0,0 +1,79 @@
+import sys
+import types
+
+import torch
+import torch.fx
+
+from dicp.vendor.TopsGraph.codegen import enflame
+from dicp.vendor.TopsGraph.codegen.enflame import EnflameCodegen
+from dicp.vendor.TopsGraph.codegen.launcher import input_device_id
+
+
+def op(graph, name, *args):
+    # the codegen picks the override from the node name
+    node = graph.create_node('call_function', torch.abs, args, name=name)
+    node.meta['val'] = torch.empty(2, 3)
+    return node
+
+
+def make_graph():
+    graph = torch.fx.Graph()
+    x = graph.placeholder("x")
+    x.meta['val'] = torch.empty(2, 3)
+    abs_ = op(graph, "Abs", x)
+    relu = op(graph, "Relu", abs_)
+    add = op(graph, "Add", abs_, relu)
+    out = op(graph, "Abs", add)
+    graph.output((out, relu))
+    return torch.fx.GraphModule(torch.nn.Module(), graph)
+
+
+class TestCodegenChunks():
+    def test_slots_across_chunks(self):
+        codegen = EnflameCodegen(make_graph())
+        codegen.run()
+        names = {node.name: codegen.args_dict[node.name] for node, _ in codegen.build_graph_segments}
+        graph_code, chunk_decls, chunk_sources = codegen.gen_build_graph_chunks(2)
+        graph_code = graph_code.getvalue()
+
+        # [x, Abs], [Relu, Add], [Abs_1]: every op read by a later chunk or the output has a slot
+        assert len(chunk_sources) == 3
+        assert chunk_decls.count("void build_chunk_") == 3
+        assert "ops.reserve(4);" in graph_code
+        assert [line.strip() for line in chunk_sources[0].splitlines() if "ops[" in line or "ops.push" in line] == [
+            f"ops.push_back({names['Abs']});"]
+        assert f"builder::Op {names['Abs']} = ops[0];" in chunk_sources[1]
+        assert f"ops.push_back({names['Relu']});" in chunk_sources[1]
+        assert f"ops.push_back({names['Add']});" in chunk_sources[1]
+        assert f"builder::Op {names['Add']} = ops[2];" in chunk_sources[2]
+        assert f"ops.push_back({names['Abs_1']});" in chunk_sources[2]
+        # the outputs are read back from their slots
+        assert f"builder::Op {names['Abs_1']} = ops[3];" in graph_code
+        assert f"builder::Op {names['Relu']} = ops[1];" in graph_code
+        assert f"SetOutput({{{names['Abs_1']}, {names['Relu']}}})" in graph_code
+
+    def test_chunk_size_from_config(self, monkeypatch):
+        monkeypatch.setattr(enflame, "tops_codegen_chunk_size", 2)
+        codegen = EnflameCodegen(make_graph())
+        codegen.run()
+        code = codegen.gen_compile_graph_code()
+        assert "TopsCompileJob(source_code, [chunk_source_0, chunk_source_1, chunk_source_2])" in code
+
+        monkeypatch.setattr(enflame, "tops_codegen_chunk_size", 1000)
+        codegen = EnflameCodegen(make_graph())
+        codegen.run()
+        assert "TopsCompileJob(source_code, [])" in codegen.gen_compile_graph_code()
+
+
+class TestDeviceId():
+    def test_cpu_inputs_fall_back_to_current_device(self, monkeypatch):
+        torch_dipu = types.ModuleType("torch_dipu")
+        torch_dipu.current_device = lambda: 3
+        monkeypatch.setitem(sys.modules, "torch_dipu", torch_dipu)
+        assert input_device_id((torch.randn(2), 4), "dipu") == 3
+
+    def test_call_reads_device_of_inputs(self):
+        codegen = EnflameCodegen(make_graph())
+        codegen.run()
+        code = codegen.gen_call_func()
+        assert "device_id = input_device_id((op0,), 'dipu')" in code